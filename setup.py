@@ -1,9 +1,26 @@
-from setuptools import setup, find_packages
+from setuptools import setup, find_packages, Extension
+
+# The native BM25 kernel is optional: without Cython, retrieval falls back to numba/NumPy
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize(
+        [
+            Extension(
+                "src.rag.retrieval._bm25_core",
+                ["src/rag/retrieval/_bm25_core.pyx"],
+                extra_compile_args=["-O3"]
+            )
+        ],
+        language_level=3
+    )
+except ImportError:
+    ext_modules = []
 
 setup(
     name="multiagent-system",
     version="0.1.0",
     packages=find_packages(),
+    ext_modules=ext_modules,
     install_requires=[
         "fastapi>=0.100.0",
         "uvicorn>=0.22.0",
@@ -13,9 +30,9 @@ setup(
         "python-dotenv>=1.0.0",
         "aiohttp>=3.8.5",
         "beautifulsoup4>=4.12.2",
+        "lxml>=4.9.3",
         "numpy>=1.24.0",
         "pillow>=10.0.0",
-        "pytesseract>=0.3.10",
         "easyocr>=1.7.0",
         "weaviate-client>=3.23.0",
         "chromadb>=0.4.13",
@@ -7,7 +7,12 @@ from src.config.settings import settings
 from src.llm.providers import get_llm_provider
 from src.rag.vectorstores import get_vector_store
 from src.rag.embeddings import get_embeddings_model
-from src.rag.retrieval.hybrid_search import HybridSearchRetriever
+from src.rag.cache import SemanticCache
+from src.rag.retrieval.hybrid_search import (
+    HybridSearchRetriever,
+    invalidate_document_cache,
+    invalidate_keyword_indexes
+)
 from src.agents.coordinator import AgentCoordinator
 from src.agents.specialized import (
     get_research_agent,
@@ -15,6 +20,18 @@ from src.agents.specialized import (
     get_creative_agent
 )
 
+# Shared across requests so near-duplicate queries hit earlier results
+semantic_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl=settings.SEMANTIC_CACHE_TTL
+)
+
+def _on_ingest() -> None:
+    """Invalidate process-wide search state after documents are added through a store."""
+    semantic_cache.clear()
+    invalidate_keyword_indexes()
+    invalidate_document_cache()
+
 async def get_vectorstore() -> AsyncGenerator[VectorStore, None]:
     """Dependency for providing vector database access."""
     try:
@@ -23,7 +40,10 @@ async def get_vectorstore() -> AsyncGenerator[VectorStore, None]:
             vector_db_type=settings.VECTOR_DB_TYPE,
             host=settings.VECTOR_DB_HOST,
             port=settings.VECTOR_DB_PORT,
-            embeddings=embeddings
+            embeddings=embeddings,
+            # Documents ingested through the store invalidate cached search results,
+            # the shared keyword indexes and cached documents
+            on_ingest=_on_ingest
         )
         yield vector_store
     except Exception as e:
@@ -40,7 +60,8 @@ async def get_retriever(
         retriever = HybridSearchRetriever(
             vector_store=vectorstore,
             bm25_weight=0.3,
-            vector_weight=0.7
+            vector_weight=0.7,
+            semantic_cache=semantic_cache
         )
         yield retriever
     except Exception as e:
@@ -1,16 +1,20 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, StrictBool, StrictFloat, StrictInt, StrictStr
 
 from src.rag.retrieval.hybrid_search import HybridSearchRetriever
 from src.api.dependencies import get_retriever
 
 router = APIRouter()
 
+# Metadata filters are exact matches on scalar values; operator clauses such as
+# {"$or": [...]} or {"year": {"$gte": 2020}} are rejected with a 422
+FilterValue = Union[StrictBool, StrictInt, StrictFloat, StrictStr]
+
 class SearchQuery(BaseModel):
     """Query model for search requests."""
     query: str
-    filters: Optional[Dict[str, Any]] = None
+    filters: Optional[Dict[str, FilterValue]] = None
     top_k: Optional[int] = 5
     hybrid_alpha: Optional[float] = 0.7  # Weight for hybrid search (1.0 = all vector, 0.0 = all keyword)
 
@@ -17,6 +17,9 @@ logger = get_logger(__name__)
 UPLOAD_DIR = Path("./uploads/temp")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Shared processor; creating it at import starts the EasyOCR preload
+ocr_processor = OCRProcessor(use_gpu=False)  # Set to True if GPU is available
+
 class OCRRequest(BaseModel):
     """Request model for OCR processing with existing file path."""
     image_path: str
@@ -52,7 +55,6 @@ async def ocr_upload(
             shutil.copyfileobj(file.file, buffer)
         
         # Process the image with OCR
-        ocr_processor = OCRProcessor(use_gpu=False)  # Set to True if GPU is available
         result = await ocr_processor.process_image(
             image_path=str(temp_file_path),
             use_enhanced_mode=use_enhanced_mode
@@ -92,7 +94,6 @@ async def ocr_process(request: OCRRequest):
     """
     try:
         # Process the image with OCR
-        ocr_processor = OCRProcessor(use_gpu=False)  # Set to True if GPU is available
         result = await ocr_processor.process_image(
             image_path=request.image_path,
             use_enhanced_mode=request.use_enhanced_mode
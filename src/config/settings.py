@@ -11,10 +11,16 @@ load_dotenv()
 class Settings(BaseSettings):
     """Application settings, loaded from environment variables."""
     
+    # Environment settings
+    ENVIRONMENT: str = Field("development", description="Deployment environment (development, test, production)")
+    
     # API settings
     API_KEY: Optional[str] = Field(None, description="API key for authentication")
     API_HOST: str = Field("0.0.0.0", description="API host")
     API_PORT: int = Field(8000, description="API port")
+    API_WORKERS: Optional[int] = Field(None, description="Number of API worker processes (default: CPU count)")
+    API_LIMIT_CONCURRENCY: Optional[int] = Field(None, description="Max concurrent connections per worker")
+    API_BACKLOG: int = Field(2048, description="Max pending connections in the socket backlog")
     
     # LLM settings
     OPENAI_API_KEY: Optional[str] = Field(None, description="OpenAI API key")
@@ -30,6 +36,16 @@ class Settings(BaseSettings):
     # RAG settings
     EMBEDDING_MODEL: str = Field("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", 
                                 description="Embedding model to use")
+    EMBEDDING_BACKEND: str = Field("sentence-transformers",
+                                  description="Embedding backend ('sentence-transformers' or 'fastembed')")
+    EMBEDDING_BATCH_SIZE: Optional[int] = Field(None,
+                                               description="Embedding batch size (default: 32 on CPU, 128 on GPU)")
+    
+    # Cache settings
+    LLM_CACHE_PATH: Optional[str] = Field(".llm_cache.db", description="SQLite file for cached LLM responses (unset to disable)")
+    EMBEDDING_CACHE_DIR: Optional[str] = Field("./cache/embeddings", description="Directory for cached document embeddings (unset to disable)")
+    SEMANTIC_CACHE_THRESHOLD: float = Field(0.97, description="Minimum query similarity for a semantic cache hit")
+    SEMANTIC_CACHE_TTL: Optional[float] = Field(300.0, description="Seconds a semantic cache entry stays valid (unset to never expire)")
     
     # Audio settings
     ELEVENLABS_API_KEY: Optional[str] = Field(None, description="ElevenLabs API key")
@@ -37,6 +53,7 @@ class Settings(BaseSettings):
     
     # Web search settings
     SERPAPI_API_KEY: Optional[str] = Field(None, description="SerpAPI key for web search")
+    HTTP_CACHE_PATH: Optional[str] = Field(".http_cache", description="SQLite cache for outbound HTTP responses (unset to disable)")
     
     # Storage settings
     UPLOAD_DIR: str = Field("./uploads", description="Directory for uploaded files")
@@ -52,6 +69,8 @@ class Settings(BaseSettings):
     
     # Vietnamese language settings
     VIETNAMESE_SUPPORT: bool = Field(True, description="Enable Vietnamese language support")
+    LANGUAGE_ID_MODEL_PATH: Optional[str] = Field("./models/lid.176.bin",
+                                                 description="fastText language ID model (requires the fasttext package)")
     
     class Config:
         env_file = ".env"
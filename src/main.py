@@ -2,19 +2,24 @@ import asyncio
 import uvicorn
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.responses import ORJSONResponse
 import os
 
 from src.api.routes import agents, rag, vision, audio
 from src.api.middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware, TracingMiddleware
 from src.config.settings import settings
+from src.rag.cache import setup_llm_cache
 from src.utils.logging import setup_global_logging
+from src.web.search import close_session
 
 # Configure logging
 setup_global_logging()
 
+# Answer repeated prompts from the LLM response cache
+setup_llm_cache()
+
 # Create FastAPI application
 app = FastAPI(
     title="Multiagent System API",
@@ -22,6 +27,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url=None,  # Disable default docs
     redoc_url=None, # Disable default redoc
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -43,8 +49,10 @@ os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(os.path.join(settings.UPLOAD_DIR, "audio"), exist_ok=True)
 os.makedirs(os.path.join(settings.UPLOAD_DIR, "images"), exist_ok=True)
 
-# Mount static files
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+# Mount static files in development only; in production the reverse proxy
+# serves UPLOAD_DIR directly with sendfile (see docs/architecture.md)
+if settings.ENVIRONMENT == "development":
+    app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Include routers
 app.include_router(agents.router, prefix="/api/agents", tags=["Agents"])
@@ -52,6 +60,11 @@ app.include_router(rag.router, prefix="/api/rag", tags=["RAG"])
 app.include_router(vision.router, prefix="/api/vision", tags=["Vision"])
 app.include_router(audio.router, prefix="/api/audio", tags=["Audio"])
 
+@app.on_event("shutdown")
+async def shutdown_http_session():
+    """Close the shared outbound HTTP session."""
+    await close_session()
+
 # Custom documentation endpoints
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
@@ -70,16 +83,30 @@ async def health_check():
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": f"An unexpected error occurred: {str(exc)}"}
     )
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "src.main:app",
-        host=settings.API_HOST,
-        port=settings.API_PORT,
-        reload=True,
-        log_level=settings.LOG_LEVEL.lower(),
-    ) 
\ No newline at end of file
+    if settings.ENVIRONMENT == "development":
+        uvicorn.run(
+            "src.main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            reload=True,
+            log_level=settings.LOG_LEVEL.lower(),
+        )
+    else:
+        # uvloop + httptools event loop, one worker per core
+        uvicorn.run(
+            "src.main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            loop="uvloop",
+            http="httptools",
+            workers=settings.API_WORKERS or os.cpu_count(),
+            limit_concurrency=settings.API_LIMIT_CONCURRENCY,
+            backlog=settings.API_BACKLOG,
+            log_level=settings.LOG_LEVEL.lower(),
+        ) 
\ No newline at end of file
@@ -0,0 +1,156 @@
+from typing import Any, Hashable, List, Optional
+import threading
+import time
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from src.config.settings import settings
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_llm_cache_ready = False
+
+def setup_llm_cache(database_path: Optional[str] = None) -> None:
+    """
+    Enable LangChain's global LLM response cache (SQLite-backed).
+    
+    Identical prompts are answered from the cache instead of the provider API.
+    Safe to call more than once; only the first call has an effect.
+    
+    Args:
+        database_path: SQLite file for cached responses (defaults to LLM_CACHE_PATH)
+    """
+    global _llm_cache_ready
+    
+    database_path = database_path or settings.LLM_CACHE_PATH
+    if _llm_cache_ready or not database_path:
+        return
+    
+    from langchain.cache import SQLiteCache
+    from langchain.globals import set_llm_cache
+    
+    set_llm_cache(SQLiteCache(database_path=database_path))
+    _llm_cache_ready = True
+    logger.info(f"LLM response cache enabled at {database_path}")
+
+def cache_embeddings(
+    embeddings: Embeddings,
+    namespace: str,
+    cache_dir: Optional[str] = None
+) -> Embeddings:
+    """
+    Wrap an embeddings model so document embeddings are cached on disk.
+    
+    Args:
+        embeddings: The underlying embeddings model
+        namespace: Cache namespace, normally the model name, so models never share vectors
+        cache_dir: Directory for cached vectors (defaults to EMBEDDING_CACHE_DIR)
+    
+    Returns:
+        The cache-backed embeddings, or the original model if caching is disabled
+    """
+    cache_dir = cache_dir or settings.EMBEDDING_CACHE_DIR
+    if not cache_dir:
+        return embeddings
+    
+    from langchain.embeddings import CacheBackedEmbeddings
+    from langchain.storage import LocalFileStore
+    
+    return CacheBackedEmbeddings.from_bytes_store(
+        embeddings,
+        LocalFileStore(cache_dir),
+        namespace=namespace
+    )
+
+class SemanticCache:
+    """
+    Cache keyed by query embedding rather than exact query text.
+    
+    A lookup returns the value stored for the most similar earlier query if its
+    cosine similarity reaches the threshold, so near-duplicate questions reuse
+    results. Vectors are kept in one preallocated matrix and matched with a
+    single matrix-vector product; the oldest entries are overwritten first.
+    Entries expire after `ttl` seconds, so documents ingested without clearing
+    the cache show up in results eventually.
+    """
+    
+    def __init__(self, threshold: float = 0.97, maxsize: int = 1024, ttl: Optional[float] = 300.0):
+        """
+        Initialize the cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            maxsize: Maximum number of entries to keep
+            ttl: Seconds an entry stays valid (None to never expire)
+        """
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._times = np.zeros(maxsize, dtype=np.float64)
+        self._vectors: Optional[np.ndarray] = None
+        self._scopes: List[Optional[Hashable]] = [None] * maxsize
+        self._values: List[Any] = [None] * maxsize
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+    
+    def get(self, embedding: List[float], scope: Hashable = None) -> Optional[Any]:
+        """
+        Look up the value for the most similar cached query.
+        
+        Args:
+            embedding: Query embedding
+            scope: Entries only match lookups with an equal scope (e.g. k and filters)
+        
+        Returns:
+            The cached value, or None on a miss
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._size == 0 or self._vectors.shape[1] != len(query):
+                return None
+            
+            similarities = self._vectors[:self._size] @ query
+            if self.ttl is not None:
+                similarities[self._times[:self._size] < time.monotonic() - self.ttl] = -np.inf
+            for i in np.argsort(-similarities):
+                if similarities[i] < self.threshold:
+                    return None
+                if self._scopes[i] == scope:
+                    return self._values[i]
+        return None
+    
+    def put(self, embedding: List[float], value: Any, scope: Hashable = None) -> None:
+        """
+        Store a value for a query embedding.
+        
+        Args:
+            embedding: Query embedding
+            value: Value to cache
+            scope: Scope the entry belongs to
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.maxsize, len(vector)), dtype=np.float32)
+                self._size = self._next = 0
+            
+            self._vectors[self._next] = vector
+            self._scopes[self._next] = scope
+            self._values[self._next] = value
+            self._times[self._next] = time.monotonic()
+            self._next = (self._next + 1) % self.maxsize
+            self._size = min(self._size + 1, self.maxsize)
+    
+    def clear(self) -> None:
+        """Drop all entries (e.g. after the underlying corpus changes)."""
+        with self._lock:
+            self._scopes = [None] * self.maxsize
+            self._values = [None] * self.maxsize
+            self._size = self._next = 0
@@ -2,6 +2,8 @@ from typing import Dict, Any, Optional
 from langchain.embeddings.base import Embeddings
 
 from src.config.settings import settings
+from src.rag.cache import cache_embeddings
+from src.rag.embeddings.multilingual import MultilingualEmbeddings
 from src.rag.embeddings.vietnamese import VietnameseOptimizedEmbeddings
 
 def get_embeddings_model(model_name: Optional[str] = None) -> Embeddings:
@@ -12,21 +14,23 @@ def get_embeddings_model(model_name: Optional[str] = None) -> Embeddings:
         model_name: Optional override for the embeddings model
         
     Returns:
-        Configured embeddings model
+        Configured embeddings model, with document embeddings cached on disk
     """
     model_name = model_name or settings.EMBEDDING_MODEL
     
     # Special case for Vietnamese optimized embeddings
     if settings.VIETNAMESE_SUPPORT and model_name.startswith("vi-"):
-        return VietnameseOptimizedEmbeddings(
+        embeddings = VietnameseOptimizedEmbeddings(
             model_name=model_name.replace("vi-", ""),
-            use_hybrid=True
+            use_hybrid=True,
+            batch_size=settings.EMBEDDING_BATCH_SIZE
         )
+        return cache_embeddings(embeddings, namespace=model_name)
     
-    # Otherwise, use standard HuggingFace embeddings
-    from langchain.embeddings import HuggingFaceEmbeddings
-    
-    return HuggingFaceEmbeddings(
+    # Otherwise, encode with the SentenceTransformer (or FastEmbed) model directly
+    embeddings = MultilingualEmbeddings(
         model_name=model_name,
-        model_kwargs={"device": "cuda" if settings.USE_GPU else "cpu"}
+        batch_size=settings.EMBEDDING_BATCH_SIZE,
+        backend=settings.EMBEDDING_BACKEND
     )
+    return cache_embeddings(embeddings, namespace=f"{settings.EMBEDDING_BACKEND}:{model_name}")
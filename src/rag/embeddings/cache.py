@@ -0,0 +1,63 @@
+from typing import List, Optional, Sequence, Union
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU cache of query embeddings.
+    
+    Entries are content-addressed (keyed by a hash of the query text), so
+    repeated queries skip the encoder entirely. Vectors are stored as
+    read-only float32 arrays.
+    """
+    
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of embeddings to keep
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+    
+    def get_array(self, text: str) -> Optional[np.ndarray]:
+        """Get the cached embedding as a read-only float32 array, or None on a miss."""
+        key = self._key(text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+        return embedding
+    
+    def get(self, text: str) -> Optional[List[float]]:
+        """Get the cached embedding for a query, or None on a miss."""
+        embedding = self.get_array(text)
+        return None if embedding is None else embedding.tolist()
+    
+    def put(self, text: str, embedding: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+        """
+        Store the embedding for a query, evicting the least recently used entry.
+        
+        Returns:
+            The stored read-only float32 array
+        """
+        vector = np.ascontiguousarray(embedding, dtype=np.float32)
+        if vector is embedding:
+            vector = vector.copy()
+        vector.setflags(write=False)
+        
+        key = self._key(text)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return vector
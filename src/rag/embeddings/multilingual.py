@@ -0,0 +1,113 @@
+from typing import List, Optional
+import asyncio
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from src.rag.embeddings.cache import QueryEmbeddingCache
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class MultilingualEmbeddings(Embeddings):
+    """
+    Embeddings backed directly by a SentenceTransformer model.
+    
+    Texts are encoded in tuned batches with normalization done inside the
+    encoder, so vectors are ready for cosine/inner-product search as returned.
+    The "fastembed" backend serves the same interface from an ONNX runtime for
+    large ingests.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        device: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        backend: str = "sentence-transformers"
+    ):
+        """
+        Initialize multilingual embeddings.
+        
+        Args:
+            model_name: Name of the embedding model
+            device: Device to use ('cpu' or 'cuda')
+            batch_size: Encoding batch size (defaults to 32 on CPU, 128 on GPU)
+            backend: Encoder backend ('sentence-transformers' or 'fastembed')
+        """
+        from src.config.settings import settings
+        
+        self.model_name = model_name
+        self.device = device or ("cuda" if settings.USE_GPU else "cpu")
+        self.batch_size = batch_size or (128 if self.device.startswith("cuda") else 32)
+        self.backend = backend
+        self.query_cache = QueryEmbeddingCache()
+        
+        logger.info(
+            f"Initializing {backend} embeddings with model {model_name} on {self.device} "
+            f"(batch size: {self.batch_size})"
+        )
+        
+        if backend == "fastembed":
+            # Import here so the ONNX runtime is only required when selected
+            from fastembed import TextEmbedding
+            self.model = TextEmbedding(model_name=model_name)
+        else:
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(model_name, device=self.device)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a 2-D float32 array of L2-normalized vectors."""
+        if self.backend == "fastembed":
+            embeddings = np.asarray(
+                list(self.model.embed(texts, batch_size=self.batch_size)),
+                dtype=np.float32
+            )
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            return embeddings / np.clip(norms, 1e-12, None)
+        
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+            device=self.device
+        ).astype(np.float32, copy=False)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of documents.
+        
+        Args:
+            texts: List of texts to embed
+        
+        Returns:
+            List of embedding vectors
+        """
+        if not texts:
+            return []
+        return self._encode(texts).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query text.
+        
+        Args:
+            text: Query text to embed
+        
+        Returns:
+            Embedding vector
+        """
+        embedding = self.query_cache.get(text)
+        if embedding is None:
+            embedding = self._encode([text])[0].tolist()
+            self.query_cache.put(text, embedding)
+        return embedding
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents without blocking the event loop."""
+        return await asyncio.to_thread(self.embed_documents, texts)
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query without blocking the event loop."""
+        return await asyncio.to_thread(self.embed_query, text)
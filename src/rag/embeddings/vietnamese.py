@@ -1,11 +1,17 @@
 from typing import Dict, Any, List, Optional, Union
+import asyncio
 import numpy as np
 from langchain.embeddings.base import Embeddings
 
+from src.rag.embeddings.cache import QueryEmbeddingCache
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit L2 norm."""
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
 class VietnameseOptimizedEmbeddings(Embeddings):
     """
     Embeddings optimized for Vietnamese text.
@@ -21,7 +27,9 @@ class VietnameseOptimizedEmbeddings(Embeddings):
         model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
         preprocessing: bool = True,
         use_hybrid: bool = True,
-        device: Optional[str] = None
+        device: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        release_memory: bool = False
     ):
         """
         Initialize Vietnamese-optimized embeddings.
@@ -31,10 +39,15 @@ class VietnameseOptimizedEmbeddings(Embeddings):
             preprocessing: Whether to apply Vietnamese-specific preprocessing
             use_hybrid: Whether to use hybrid approach (combining different embeddings)
             device: Device to use ('cpu' or 'cuda')
+            batch_size: Encoding batch size (defaults to 32 on CPU, 128 on GPU)
+            release_memory: Free cached GPU memory after each secondary-model batch
+                (for memory-constrained devices; slower otherwise)
         """
         self.model_name = model_name
         self.preprocessing = preprocessing
         self.use_hybrid = use_hybrid
+        self.release_memory = release_memory
+        self.query_cache = QueryEmbeddingCache()
         
         # Import here to avoid loading models unnecessarily
         from sentence_transformers import SentenceTransformer
@@ -42,6 +55,7 @@ class VietnameseOptimizedEmbeddings(Embeddings):
         # Set device (CPU or GPU)
         from src.config.settings import settings
         self.device = device or ("cuda" if settings.USE_GPU else "cpu")
+        self.batch_size = batch_size or (128 if self.device.startswith("cuda") else 32)
         
         logger.info(f"Initializing Vietnamese embeddings with model {model_name} on {self.device}")
         
@@ -58,6 +72,11 @@ class VietnameseOptimizedEmbeddings(Embeddings):
                 self.secondary_tokenizer = AutoTokenizer.from_pretrained(secondary_model_name)
                 self.secondary_model = AutoModel.from_pretrained(secondary_model_name)
                 self.secondary_model.to(self.device)
+                
+                # Inference only: disable dropout and gradient tracking up front
+                self.secondary_model.eval()
+                for param in self.secondary_model.parameters():
+                    param.requires_grad_(False)
                 logger.info(f"Loaded secondary model {secondary_model_name} for hybrid embeddings")
             except Exception as e:
                 logger.warning(f"Failed to load secondary model: {str(e)}")
@@ -91,38 +110,51 @@ class VietnameseOptimizedEmbeddings(Embeddings):
         
         return text
     
-    def _get_secondary_embedding(self, text: str) -> List[float]:
+    def _get_secondary_embeddings(self, texts: List[str]) -> Any:
         """
-        Get embeddings from the secondary model.
+        Get embeddings from the secondary model for a batch of texts.
+        
+        On CUDA the work is only queued (pinned, non-blocking host-to-device
+        copies), so callers can overlap it with other GPU work on another stream.
         
         Args:
-            text: Text to embed
+            texts: Texts to embed
             
         Returns:
-            Embedding vector
+            Tensor of [CLS] embeddings, one row per text, on the model device
         """
         import torch
         
-        # Preprocess and tokenize
-        inputs = self.secondary_tokenizer(
-            text, 
-            return_tensors="pt", 
-            padding=True, 
-            truncation=True, 
-            max_length=512
-        )
-        
-        # Move inputs to the same device as the model
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
-        # Get embeddings
-        with torch.no_grad():
-            outputs = self.secondary_model(**inputs)
-        
-        # Use [CLS] token embedding as the sentence embedding
-        embedding = outputs.last_hidden_state[:, 0, :].cpu().numpy()[0]
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            # Tokenize a batch
+            inputs = self.secondary_tokenizer(
+                texts[start:start + self.batch_size],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=512
+            )
+            
+            # Move inputs to the same device as the model
+            if self.device.startswith("cuda"):
+                inputs = {k: v.pin_memory().to(self.device, non_blocking=True) for k, v in inputs.items()}
+            else:
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            
+            # Get embeddings
+            with torch.inference_mode():
+                outputs = self.secondary_model(**inputs)
+            
+            # Use [CLS] token embedding as the sentence embedding; clone it so the
+            # slice does not keep the whole hidden-state tensor alive
+            batches.append(outputs.last_hidden_state[:, 0, :].clone())
+            
+            if self.release_memory and self.device.startswith("cuda"):
+                del outputs, inputs
+                torch.cuda.empty_cache()
         
-        return embedding.tolist()
+        return torch.cat(batches)
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
@@ -134,46 +166,64 @@ class VietnameseOptimizedEmbeddings(Embeddings):
         Returns:
             List of embedding vectors
         """
+        if not texts:
+            return []
+        
         # Preprocess texts
         if self.preprocessing:
             texts = [self._preprocess_vietnamese(text) for text in texts]
         
-        # Get primary embeddings
-        primary_embeddings = self.model.encode(texts)
+        hybrid = self.use_hybrid and self.secondary_model is not None
+        
+        # On GPU, queue the secondary model on its own stream first so its kernels
+        # overlap with the primary encode running on the default stream
+        secondary_embeddings = None
+        secondary_stream = None
+        if hybrid and self.device.startswith("cuda"):
+            import torch
+            secondary_stream = torch.cuda.Stream(device=self.device)
+            try:
+                with torch.cuda.stream(secondary_stream):
+                    secondary_embeddings = self._get_secondary_embeddings(texts)
+            except Exception as e:
+                logger.warning(f"Error in secondary embedding: {str(e)}, falling back to primary")
+                hybrid = False
+        
+        # Get primary embeddings (batched and normalized inside the encoder)
+        primary_embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+            device=self.device
+        ).astype(np.float32, copy=False)
         
         # If not using hybrid approach, return primary embeddings
-        if not self.use_hybrid or self.secondary_model is None:
+        if not hybrid:
             return primary_embeddings.tolist()
         
         # Get secondary embeddings and combine
-        combined_embeddings = []
-        for i, text in enumerate(texts):
-            try:
-                secondary_embedding = self._get_secondary_embedding(text)
-                
-                # Combine embeddings (simple concatenation with normalization)
-                primary = np.array(primary_embeddings[i])
-                secondary = np.array(secondary_embedding)
-                
-                # Resize to same dimension if needed
-                if len(primary) != len(secondary):
-                    # Use the smaller dimension
-                    min_dim = min(len(primary), len(secondary))
-                    primary = primary[:min_dim]
-                    secondary = secondary[:min_dim]
-                
-                # Weighted average (50-50 by default)
-                combined = 0.5 * primary + 0.5 * secondary
-                
-                # Normalize
-                combined = combined / np.linalg.norm(combined)
-                
-                combined_embeddings.append(combined.tolist())
-            except Exception as e:
-                logger.warning(f"Error in secondary embedding: {str(e)}, falling back to primary")
-                combined_embeddings.append(primary_embeddings[i].tolist())
+        try:
+            if secondary_stream is not None:
+                secondary_stream.synchronize()
+            else:
+                secondary_embeddings = self._get_secondary_embeddings(texts)
+            secondary = secondary_embeddings.float().cpu().numpy()
+        except Exception as e:
+            logger.warning(f"Error in secondary embedding: {str(e)}, falling back to primary")
+            return primary_embeddings.tolist()
+        
+        # Resize to same dimension if needed (use the smaller dimension)
+        min_dim = min(primary_embeddings.shape[1], secondary.shape[1])
         
-        return combined_embeddings
+        # Weighted average (50-50 by default) of unit vectors, so neither model
+        # dominates by magnitude, then normalize
+        primary = _normalize_rows(primary_embeddings[:, :min_dim])
+        secondary = _normalize_rows(secondary[:, :min_dim])
+        combined = 0.5 * primary + 0.5 * secondary
+        
+        return _normalize_rows(combined).tolist()
     
     def embed_query(self, text: str) -> List[float]:
         """
@@ -185,8 +235,20 @@ class VietnameseOptimizedEmbeddings(Embeddings):
         Returns:
             Embedding vector
         """
-        # For queries, the process is the same as for documents
-        return self.embed_documents([text])[0]
+        embedding = self.query_cache.get(text)
+        if embedding is None:
+            # For queries, the process is the same as for documents
+            embedding = self.embed_documents([text])[0]
+            self.query_cache.put(text, embedding)
+        return embedding
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents without blocking the event loop."""
+        return await asyncio.to_thread(self.embed_documents, texts)
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query without blocking the event loop."""
+        return await asyncio.to_thread(self.embed_query, text)
 
 def get_vietnamese_embeddings() -> VietnameseOptimizedEmbeddings:
     """Factory function to create Vietnamese optimized embeddings."""
@@ -0,0 +1,49 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True, language_level=3
+"""
+Native BM25 score accumulation over CSR posting lists.
+
+Mirrors `keyword_index._bm25_accumulate`. The loop runs with the GIL
+released, so searches in worker threads score in parallel.
+"""
+
+cdef void _accumulate(
+    const long long[::1] term_ids,
+    const float[::1] idf,
+    const long long[::1] postings_idx,
+    const int[::1] postings_docs,
+    const float[::1] postings_tf,
+    const float[::1] doc_len,
+    float k1,
+    float b,
+    float avgdl,
+    float[::1] scores
+) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef long long p, term
+    cdef int doc
+    cdef float weight, tf, norm
+    
+    for i in range(term_ids.shape[0]):
+        term = term_ids[i]
+        weight = idf[term]
+        for p in range(postings_idx[term], postings_idx[term + 1]):
+            doc = postings_docs[p]
+            tf = postings_tf[p]
+            norm = k1 * (1.0 - b + b * doc_len[doc] / avgdl)
+            scores[doc] += weight * tf * (k1 + 1.0) / (tf + norm)
+
+def bm25_accumulate(
+    const long long[::1] term_ids,
+    const float[::1] idf,
+    const long long[::1] postings_idx,
+    const int[::1] postings_docs,
+    const float[::1] postings_tf,
+    const float[::1] doc_len,
+    float k1,
+    float b,
+    float avgdl,
+    float[::1] scores
+):
+    """Add the BM25 contribution of each query term to `scores`."""
+    with nogil:
+        _accumulate(term_ids, idf, postings_idx, postings_docs, postings_tf, doc_len, k1, b, avgdl, scores)
@@ -1,13 +1,189 @@
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import Callable, Dict, Any, List, Literal, Optional, Tuple, Union
 import asyncio
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from langchain.schema.vectorstore import VectorStore
 from pydantic import BaseModel, Field
 import numpy as np
 
+from src.rag.cache import SemanticCache
+from src.rag.embeddings.cache import QueryEmbeddingCache
+from src.rag.retrieval.dense_index import DenseIndex, normalize_rows
+from src.rag.retrieval.keyword_index import KeywordIndex, top_k_indices
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+class UnsupportedFilterError(ValueError):
+    """Raised when a vector store ignores metadata filters (its results would leak other documents)."""
+
+@dataclass(slots=True)
+class SearchHit:
+    """A retrieved document with its combined and per-retriever scores."""
+    content: str
+    metadata: Dict[str, Any]
+    score: float
+    vector_score: float = 0.0
+    keyword_score: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the dictionary format returned by the retriever API."""
+        return {
+            "content": self.content,
+            "metadata": self.metadata,
+            "score": self.score,
+            "vector_score": self.vector_score,
+            "keyword_score": self.keyword_score
+        }
+
+# Common Vietnamese and English function words, dropped from query keywords
+_STOPWORDS = frozenset({
+    "và", "của", "là", "có", "trong", "cho", "với", "các", "những", "một",
+    "được", "này", "đó", "thì", "mà", "về", "từ", "khi", "để", "như",
+    "the", "a", "an", "and", "or", "of", "in", "on", "for", "to", "is", "are", "what", "how"
+})
+
+@functools.lru_cache(maxsize=4096)
+def _extract_keywords(query: str) -> Tuple[str, ...]:
+    """
+    Extract keywords from a query: content words plus adjacent word pairs.
+    
+    Vietnamese words are mostly two syllables ("lịch sử", "Việt Nam"), so pairs
+    of adjacent non-stopword tokens are kept as keywords too. Results are
+    cached because the same queries recur.
+    
+    Args:
+        query: The search query
+        
+    Returns:
+        Lowercased keywords, unigrams first
+    """
+    tokens = KeywordIndex.tokenize(query)
+    words = [token for token in tokens if token not in _STOPWORDS]
+    kept = set(words)
+    pairs = [
+        f"{first} {second}"
+        for first, second in zip(tokens, tokens[1:])
+        if first in kept and second in kept
+    ]
+    return tuple(dict.fromkeys(words + pairs))
+
+# Query embeddings shared by all retrievers (they are created per request),
+# keyed by embedding model and query text
+_query_embeddings = QueryEmbeddingCache(maxsize=2048)
+
+def _embeddings_namespace(embeddings: Any) -> Optional[str]:
+    """
+    Identify an embeddings model by its configuration rather than its instance.
+    
+    Models are rebuilt per request, so the namespace is derived from the model
+    name and the options that change its output (unwrapping CacheBackedEmbeddings).
+    
+    Args:
+        embeddings: The embeddings model
+        
+    Returns:
+        Cache namespace, or None if the model does not expose its name
+    """
+    model = getattr(embeddings, "underlying_embeddings", embeddings)
+    model_name = getattr(model, "model_name", None) or getattr(model, "model", None)
+    if not isinstance(model_name, str):
+        return None
+    
+    options = [
+        str(getattr(model, attr))
+        for attr in ("backend", "use_hybrid", "preprocessing")
+        if hasattr(model, attr)
+    ]
+    return ":".join([type(model).__name__, model_name, *options])
+
+def _weaviate_where(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate exact-match metadata filters into a Weaviate v3 where filter."""
+    def _operand(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            value_key = "valueBoolean"
+        elif isinstance(value, int):
+            value_key = "valueInt"
+        elif isinstance(value, float):
+            value_key = "valueNumber"
+        else:
+            value_key = "valueText"
+        return {"path": [key], "operator": "Equal", value_key: value}
+    
+    operands = [_operand(key, value) for key, value in filters.items()]
+    return operands[0] if len(operands) == 1 else {"operator": "And", "operands": operands}
+
+def _chroma_where(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate exact-match metadata filters into a Chroma where clause."""
+    # Chroma accepts a single key per clause; several keys must be joined with $and
+    if len(filters) == 1:
+        return dict(filters)
+    return {"$and": [{key: value} for key, value in filters.items()]}
+
+# Keyword indexes shared by all retrievers (they are created per request), keyed
+# by collection name, so BM25 is built once per process rather than per query
+_keyword_indexes: Dict[str, KeywordIndex] = {}
+_stale_keyword_indexes: set = set()
+_keyword_indexes_lock = threading.Lock()
+
+# Documents found (and IDs recently missed) by get_document, shared by all
+# retrievers and keyed by (collection name, document ID); retrievers over an
+# unnamed store use a private scope instead of the collection name
+_document_cache: "OrderedDict[Tuple[Any, str], Dict[str, Any]]" = OrderedDict()
+_miss_cache: "OrderedDict[Tuple[Any, str], None]" = OrderedDict()
+_document_cache_lock = threading.Lock()
+
+# Serializes embeddings sidecar writes (and the reads that check them) across
+# retrievers; sidecars of stores that cannot export embeddings are not retried
+_sidecar_lock = threading.RLock()
+_sidecar_export_failures: set = set()
+
+def _replace_file(path: str, write: Callable[[Any], None], mode: str = "wb") -> None:
+    """Write a file through a uniquely named temporary file, then swap it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def invalidate_keyword_indexes(collection_name: Optional[str] = None) -> None:
+    """
+    Mark shared keyword indexes stale, so the next search rebuilds them from the store.
+    
+    Args:
+        collection_name: Collection whose index is stale (None for all collections)
+    """
+    with _keyword_indexes_lock:
+        _stale_keyword_indexes.update([collection_name] if collection_name else list(_keyword_indexes))
+
+def invalidate_document_cache(collection_name: Optional[str] = None) -> None:
+    """
+    Drop documents and misses cached by `get_document`, so the next lookup reads the store.
+    
+    Args:
+        collection_name: Collection whose entries are dropped (None for all collections)
+    """
+    with _document_cache_lock:
+        for cache in (_document_cache, _miss_cache):
+            if collection_name is None:
+                cache.clear()
+                continue
+            for key in [key for key in cache if key[0] == collection_name]:
+                del cache[key]
+
+def _get_content(doc: Any) -> str:
+    """Get the text of a LangChain document or store-specific document object."""
+    return doc.page_content if hasattr(doc, "page_content") else doc.text
+
 class HybridSearchRetriever:
     """
     Retriever that combines vector search with keyword search.
@@ -21,7 +197,16 @@ class HybridSearchRetriever:
         vector_store: VectorStore,
         vector_weight: float = 0.7,
         bm25_weight: float = 0.3,
-        top_k: int = 5
+        top_k: int = 5,
+        index_path: Optional[str] = None,
+        embeddings_path: Optional[str] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        embedding_batch_size: int = 64,
+        document_cache_size: int = 1024,
+        miss_cache_size: int = 8192,
+        fusion_method: Literal["weighted", "rsf", "rrf"] = "rsf",
+        rrf_k: int = 60,
+        quantize: Optional[Literal["int8"]] = None
     ):
         """
         Initialize the hybrid search retriever.
@@ -31,17 +216,52 @@ class HybridSearchRetriever:
             vector_weight: Weight for vector search results (0.0 to 1.0)
             bm25_weight: Weight for BM25 keyword search results (0.0 to 1.0)
             top_k: Default number of results to return
+            index_path: Optional file to persist the keyword index to
+            embeddings_path: Optional .npy sidecar to persist normalized document
+                embeddings to; when present, vector search runs in-process on it
+            semantic_cache: Optional cache answering near-duplicate queries
+            embedding_batch_size: Number of documents embedded (and written) per
+                store call when adding texts
+            document_cache_size: Number of documents kept by `get_document`
+            miss_cache_size: Number of recently missed document IDs remembered
+            fusion_method: How each retriever's scores are put on a common scale
+                before weighting: "rsf" (min-max normalized, relative score fusion),
+                "rrf" (reciprocal rank) or "weighted" (raw scores)
+            rrf_k: Rank offset for reciprocal rank fusion
+            quantize: "int8" to hold the local dense index as int8 codes (4x less
+                memory and bandwidth per query, slightly less precise scores)
         """
         self.vector_store = vector_store
         self.vector_weight = vector_weight
         self.bm25_weight = bm25_weight
         self.top_k = top_k
+        self.fusion_method = fusion_method
+        self.rrf_k = rrf_k
+        self.index_path = index_path
+        self.embeddings_path = embeddings_path
+        self.quantize = quantize
+        self._keyword_index: Optional[KeywordIndex] = None
+        self._keyword_index_stale = False
+        self._keyword_index_lock = threading.Lock()
+        self._dense_index: Optional[DenseIndex] = None
+        self._dense_index_stale = False
+        self._dense_index_lock = threading.Lock()
+        self.semantic_cache = semantic_cache
+        self.embedding_batch_size = embedding_batch_size
+        self.document_cache_size = document_cache_size
+        self.miss_cache_size = miss_cache_size
+        # Cache scope for stores whose collection name is unknown
+        self._cache_scope = object()
     
     async def search(
         self,
         query: str,
         filters: Optional[Dict[str, Any]] = None,
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        *,
+        limit: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None,
+        use_hybrid: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Perform hybrid search with both vector and keyword matching.
@@ -50,41 +270,294 @@ class HybridSearchRetriever:
             query: The search query
             filters: Optional metadata filters
             top_k: Number of results to return
+            limit: Alias for top_k
+            filter: Alias for filters (LangChain naming)
+            use_hybrid: Whether to include keyword search; vector-only search
+                (also used when bm25_weight is 0) skips BM25 and fusion entirely
             
         Returns:
             List of documents with scores and metadata
+            
+        Raises:
+            UnsupportedFilterError: Vector-only search with filters on a store that ignores them
         """
-        k = top_k or self.top_k
+        k = limit or top_k or self.top_k
+        filters = filters if filters is not None else filter
         
-        # Get vector search results (semantic search)
-        try:
-            vector_results = await self._vector_search(query, k=k*2, filters=filters)
-        except Exception as e:
-            logger.error(f"Vector search failed: {str(e)}")
+        if not use_hybrid or self.bm25_weight == 0.0:
+            try:
+                vector_results = await self._vector_search(query, k=k, filters=filters)
+            except UnsupportedFilterError:
+                # No keyword results to fall back on: an empty list would read as "no matches"
+                raise
+            except Exception as e:
+                logger.error(f"Vector search failed: {str(e)}")
+                vector_results = []
+            return self._vector_only_results(vector_results, k)
+        
+        # Near-duplicate queries reuse earlier results only under identical settings
+        # (the cache is shared by retrievers of every request and collection)
+        query_embedding = None
+        scope = (
+            self._collection_name(),
+            k,
+            json.dumps(filters, sort_keys=True, default=str) if filters else None,
+            self.vector_weight,
+            self.bm25_weight,
+            self.fusion_method
+        )
+        if self.semantic_cache is not None:
+            query_embedding = await self._embed_query(query)
+            if query_embedding is not None:
+                cached = self.semantic_cache.get(query_embedding, scope)
+                if cached is not None:
+                    return [dict(result) for result in cached]
+        
+        # Run vector (semantic) and keyword (lexical) search concurrently
+        vector_results, keyword_results = await asyncio.gather(
+            self._vector_search(query, k=k*2, filters=filters),
+            self._keyword_search(query, k=k*2, filters=filters),
+            return_exceptions=True
+        )
+        
+        if isinstance(vector_results, Exception):
+            logger.error(f"Vector search failed: {str(vector_results)}")
             vector_results = []
         
-        # Get keyword search results (lexical search)
+        if isinstance(keyword_results, Exception):
+            logger.error(f"Keyword search failed: {str(keyword_results)}")
+            keyword_results = []
+        
+        results = self._rank_results(vector_results, keyword_results, k)
+        
+        if query_embedding is not None:
+            self.semantic_cache.put(query_embedding, [dict(result) for result in results], scope)
+        
+        return results
+    
+    async def search_batch(
+        self,
+        queries: List[str],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        *,
+        limit: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None,
+        use_hybrid: bool = True
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Perform hybrid search for many queries at once (e.g. bulk evaluation).
+        
+        Uncached queries are embedded in one encoder call and, with a local dense
+        index, scored against the corpus in one matrix product; otherwise each
+        query searches the store by its precomputed vector. Keyword searches
+        run concurrently in worker threads.
+        
+        Args:
+            queries: The search queries
+            filters: Optional metadata filters applied to every query
+            top_k: Number of results to return per query
+            limit: Alias for top_k
+            filter: Alias for filters (LangChain naming)
+            use_hybrid: Whether to include keyword search
+            
+        Returns:
+            One result list per query, in the same format as `search`
+        """
+        if not queries:
+            return []
+        
+        k = limit or top_k or self.top_k
+        filters = filters if filters is not None else filter
+        hybrid = use_hybrid and self.bm25_weight != 0.0
+        candidates = k*2 if hybrid else k
+        
+        keyword_task = None
+        if hybrid:
+            keyword_task = asyncio.gather(
+                *(self._keyword_search(query, k=k*2, filters=filters) for query in queries),
+                return_exceptions=True
+            )
+        
         try:
-            keyword_results = await self._keyword_search(query, k=k*2, filters=filters)
+            # All queries are encoded in one call, whichever vector path scores them
+            query_vectors = None
+            try:
+                query_vectors = await asyncio.to_thread(self._embed_queries, queries)
+            except Exception as e:
+                logger.error(f"Batched query embedding failed: {str(e)}")
+            
+            vector_batches = None
+            if self.embeddings_path and query_vectors is not None:
+                try:
+                    vector_batches = await asyncio.to_thread(
+                        self._dense_search_batch, query_vectors, candidates, filters
+                    )
+                except Exception as e:
+                    logger.error(f"Batched vector search failed: {str(e)}")
+            
+            if vector_batches is None:
+                vector_batches = await asyncio.gather(
+                    *(
+                        self._vector_search(
+                            query,
+                            k=candidates,
+                            filters=filters,
+                            query_vector=None if query_vectors is None else query_vectors[i]
+                        )
+                        for i, query in enumerate(queries)
+                    ),
+                    return_exceptions=True
+                )
+            keyword_batches = await keyword_task if hybrid else [[] for _ in queries]
+        finally:
+            # Don't leave keyword searches running (or their errors unretrieved) on failure
+            if keyword_task is not None and not keyword_task.done():
+                keyword_task.cancel()
+                await asyncio.gather(keyword_task, return_exceptions=True)
+        
+        results = []
+        for vector_results, keyword_results in zip(vector_batches, keyword_batches):
+            if isinstance(vector_results, UnsupportedFilterError) and not hybrid:
+                raise vector_results
+            if isinstance(vector_results, Exception):
+                logger.error(f"Vector search failed: {str(vector_results)}")
+                vector_results = []
+            if isinstance(keyword_results, Exception):
+                logger.error(f"Keyword search failed: {str(keyword_results)}")
+                keyword_results = []
+            if hybrid:
+                results.append(self._rank_results(vector_results, keyword_results, k))
+            else:
+                results.append(self._vector_only_results(vector_results, k))
+        
+        return results
+    
+    def _vector_only_results(self, vector_results: List[SearchHit], k: int) -> List[Dict[str, Any]]:
+        """Return vector results as-is, with the vector score as the final score (no fusion)."""
+        return [
+            SearchHit(hit.content, hit.metadata, hit.score, vector_score=hit.score).to_dict()
+            for hit in vector_results[:k]
+        ]
+    
+    def _rank_results(
+        self,
+        vector_results: List[SearchHit],
+        keyword_results: List[SearchHit],
+        k: int
+    ) -> List[Dict[str, Any]]:
+        """Combine vector and keyword results with weighting and return the top k."""
+        docs, vector_scores, keyword_scores = self._combine_results(vector_results, keyword_results)
+        scores = self.vector_weight * vector_scores + self.bm25_weight * keyword_scores
+        
+        # Partial sort; only the winners are materialized, and converted to
+        # dictionaries only at the API boundary
+        return [
+            SearchHit(
+                docs[i].content,
+                docs[i].metadata,
+                float(scores[i]),
+                vector_score=float(vector_scores[i]),
+                keyword_score=float(keyword_scores[i])
+            ).to_dict()
+            for i in top_k_indices(scores, k)
+        ]
+    
+    def _extract_keywords(self, query: str) -> List[str]:
+        """
+        Extract keywords from a query.
+        
+        Args:
+            query: The search query
+            
+        Returns:
+            List of keywords
+        """
+        return list(_extract_keywords(query))
+    
+    def _embed_query_cached(self, query: str) -> Optional[np.ndarray]:
+        """
+        Embed a query with the vector store's model, reusing cached vectors (blocking).
+        
+        Args:
+            query: The search query
+            
+        Returns:
+            Read-only float32 query vector, or None if the store has no embeddings model
+        """
+        embeddings = getattr(self.vector_store, "embeddings", None)
+        if embeddings is None:
+            return None
+        
+        namespace = _embeddings_namespace(embeddings)
+        if namespace is None:
+            return np.asarray(embeddings.embed_query(query), dtype=np.float32)
+        
+        key = f"{namespace}:{query}"
+        vector = _query_embeddings.get_array(key)
+        if vector is None:
+            vector = _query_embeddings.put(key, embeddings.embed_query(query))
+        return vector
+    
+    async def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Embed a query without blocking the event loop, or None if unavailable."""
+        embeddings = getattr(self.vector_store, "embeddings", None)
+        if embeddings is None:
+            return None
+        
+        # Cache hits are returned without a thread hop
+        namespace = _embeddings_namespace(embeddings)
+        vector = None if namespace is None else _query_embeddings.get_array(f"{namespace}:{query}")
+        if vector is not None:
+            return vector
+        
+        try:
+            return await asyncio.to_thread(self._embed_query_cached, query)
         except Exception as e:
-            logger.error(f"Keyword search failed: {str(e)}")
-            keyword_results = []
+            logger.warning(f"Query embedding failed: {str(e)}")
+            return None
+    
+    def _embed_queries(self, queries: List[str]) -> Optional[np.ndarray]:
+        """
+        Embed several queries, encoding all cache misses in one batched call (blocking).
         
-        # Combine results with weighting
-        combined_results = self._combine_results(vector_results, keyword_results)
+        The embeddings models here encode queries exactly like documents, so
+        misses go through a single `embed_documents` call on the underlying model,
+        bypassing CacheBackedEmbeddings so queries never enter the on-disk
+        document cache.
         
-        # Sort results by combined score
-        combined_results.sort(key=lambda x: x["score"], reverse=True)
+        Args:
+            queries: The search queries
+            
+        Returns:
+            Float32 matrix with one row per query, or None if the store has no embeddings model
+        """
+        embeddings = getattr(self.vector_store, "embeddings", None)
+        if embeddings is None:
+            return None
         
-        # Return top-k results
-        return combined_results[:k]
+        namespace = _embeddings_namespace(embeddings)
+        keys = [None if namespace is None else f"{namespace}:{query}" for query in queries]
+        vectors = [None if key is None else _query_embeddings.get_array(key) for key in keys]
+        misses = list(dict.fromkeys(query for query, vector in zip(queries, vectors) if vector is None))
+        
+        if misses:
+            encoder = getattr(embeddings, "underlying_embeddings", embeddings)
+            encoded = dict(zip(misses, encoder.embed_documents(misses)))
+            for i, query in enumerate(queries):
+                if vectors[i] is None:
+                    vector = np.asarray(encoded[query], dtype=np.float32)
+                    vectors[i] = vector if keys[i] is None else _query_embeddings.put(keys[i], vector)
+        
+        return np.stack(vectors)
     
     async def _vector_search(
         self, 
         query: str, 
         k: int = 10,
-        filters: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
+        filters: Optional[Dict[str, Any]] = None,
+        query_vector: Optional[np.ndarray] = None
+    ) -> List[SearchHit]:
         """
         Perform vector-based semantic search.
         
@@ -92,46 +565,146 @@ class HybridSearchRetriever:
             query: The search query
             k: Number of results to return
             filters: Optional metadata filters
+            query_vector: Optional precomputed query embedding (e.g. from a batch)
             
         Returns:
             List of documents with scores
         """
-        if hasattr(self.vector_store, "similarity_search_with_score"):
+        # Exact cosine search over the local embeddings sidecar, when configured
+        if self.embeddings_path:
+            if query_vector is None:
+                query_vector = await self._embed_query(query)
+            if query_vector is not None:
+                hits = await asyncio.to_thread(self._dense_search, query_vector, k, filters)
+                if hits is not None:
+                    return hits
+        
+        # Search by the (cached) query vector when the store supports it
+        if not hasattr(self.vector_store, "similarity_search_by_vector_with_relevance_scores"):
+            query_vector = None
+        elif query_vector is None:
+            query_vector = await self._embed_query(query)
+        
+        if query_vector is not None:
+            results = await asyncio.to_thread(
+                self.vector_store.similarity_search_by_vector_with_relevance_scores,
+                embedding=query_vector.tolist(),
+                k=k,
+                **self._filter_kwargs(filters)
+            )
+        elif hasattr(self.vector_store, "asimilarity_search_with_score"):
             results = await self.vector_store.asimilarity_search_with_score(
                 query=query,
                 k=k,
-                filter=filters
+                **self._filter_kwargs(filters)
             )
-            return [
-                {
-                    "content": doc.page_content if hasattr(doc, "page_content") else doc.text,
-                    "metadata": doc.metadata,
-                    "score": score
-                }
-                for doc, score in results
-            ]
         else:
             # Fallback for vector stores that don't support async
-            results = self.vector_store.similarity_search_with_score(
+            results = await asyncio.to_thread(
+                self.vector_store.similarity_search_with_score,
                 query=query,
                 k=k,
-                filter=filters
+                **self._filter_kwargs(filters)
             )
-            return [
-                {
-                    "content": doc.page_content if hasattr(doc, "page_content") else doc.text,
-                    "metadata": doc.metadata,
-                    "score": score
-                }
-                for doc, score in results
-            ]
+        
+        # Fail closed: a store that ignored the filter must not leak other documents
+        if filters and any(
+            any(doc.metadata.get(key) != value for key, value in filters.items())
+            for doc, _ in results
+        ):
+            raise UnsupportedFilterError(
+                f"{type(self.vector_store).__name__} does not support metadata filters; "
+                f"refusing unfiltered vector results"
+            )
+        
+        # Stores report distances (Chroma: lower is better); fusion needs relevance
+        to_relevance = self._relevance_score_fn()
+        return [SearchHit(_get_content(doc), doc.metadata, to_relevance(score)) for doc, score in results]
+    
+    def _relevance_score_fn(self) -> Callable[[float], float]:
+        """
+        Get the store's function mapping raw search scores to relevance (higher is better).
+        
+        Chroma returns distances in its collection's metric (l2 by default),
+        while the local dense index already returns cosine similarity, so store
+        scores are converted before fusion to give every path the same meaning.
+        """
+        try:
+            return self.vector_store._select_relevance_score_fn()
+        except (AttributeError, NotImplementedError, ValueError):
+            return float
+    
+    def _collection_name(self) -> Optional[str]:
+        """Get the name of the collection behind the vector store (looking through wrappers), if known."""
+        store = getattr(self.vector_store, "vector_store", self.vector_store)
+        collection = getattr(store, "_collection", None)
+        name = getattr(collection, "name", None) or getattr(store, "_index_name", None)
+        return name if isinstance(name, str) else None
+    
+    def _filter_kwargs(self, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Translate metadata filters into the vector store's native query argument.
+        
+        Filters are evaluated by the backend, so only matching documents are
+        ever scored.
+        
+        Args:
+            filters: Optional metadata filters (exact match on each key)
+            
+        Returns:
+            Keyword arguments for the store's similarity search methods
+        """
+        if not filters:
+            return {}
+        
+        # Look through wrappers such as BatchingVectorStore
+        store_type = type(getattr(self.vector_store, "vector_store", self.vector_store)).__name__
+        if store_type == "Weaviate":
+            return {"where_filter": _weaviate_where(filters)}
+        if store_type == "Chroma":
+            return {"filter": _chroma_where(filters)}
+        return {"filter": filters}
+    
+    def _dense_search(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[SearchHit]]:
+        """
+        Score the corpus against a query vector with the local dense index (blocking).
+        
+        Returns None if no dense index is available (the store can't export embeddings).
+        """
+        index = self._get_dense_index()
+        if index is None:
+            return None
+        return [
+            SearchHit(index.contents[doc_idx], index.metadatas[doc_idx], score)
+            for doc_idx, score in index.search(query_vector, k=k, filters=filters)
+        ]
+    
+    def _dense_search_batch(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[List[SearchHit]]]:
+        """Score the corpus against several query vectors at once (blocking), or None without a dense index."""
+        index = self._get_dense_index()
+        if index is None:
+            return None
+        return [
+            [SearchHit(index.contents[doc_idx], index.metadatas[doc_idx], score) for doc_idx, score in hits]
+            for hits in index.search_batch(query_vectors, k=k, filters=filters)
+        ]
     
     async def _keyword_search(
         self, 
         query: str, 
         k: int = 10,
         filters: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[SearchHit]:
         """
         Perform keyword-based lexical search.
         
@@ -150,127 +723,400 @@ class HybridSearchRetriever:
                 k=k,
                 filter=filters
             )
-            return results
+            return [SearchHit(result["content"], result["metadata"], result["score"]) for result in results]
         else:
-            # Use basic keyword matching (fallback)
-            # This is very simplified; a real implementation would use BM25 or similar
-            documents = self.vector_store.get()
-            matched_docs = []
-            
-            # Split query into keywords
-            keywords = query.lower().split()
-            
-            for doc in documents:
-                content = doc.page_content.lower() if hasattr(doc, "page_content") else doc.text.lower()
-                
-                # Calculate a simple keyword match score
-                score = sum(1 for keyword in keywords if keyword in content) / len(keywords)
+            # Fallback: BM25 over an inverted index built once per corpus
+            # (loading and scoring are CPU-bound, so keep them off the event loop)
+            return await asyncio.to_thread(self._bm25_search, query, k, filters)
+    
+    def _bm25_search(
+        self,
+        query: str,
+        k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchHit]:
+        """Score the corpus against a query with the local BM25 index (blocking)."""
+        index = self._get_keyword_index()
+        # Query terms come from the cached keyword extraction (stopwords dropped;
+        # word pairs are never index terms, so they simply don't match)
+        return [
+            SearchHit(index.contents[doc_idx], index.metadatas[doc_idx], score)
+            for doc_idx, score in index.search(query, k=k, filters=filters, terms=_extract_keywords(query))
+        ]
+    
+    def _load_corpus(self) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
+        """Read all documents (contents, metadatas, ids) from the vector store."""
+        documents = self.vector_store.get()
+        
+        # Chroma returns column-oriented results
+        if isinstance(documents, dict):
+            contents = documents.get("documents") or []
+            metadatas = [metadata or {} for metadata in (documents.get("metadatas") or [{}] * len(contents))]
+            ids = documents.get("ids") or [str(i) for i in range(len(contents))]
+            return contents, metadatas, ids
+        
+        contents, metadatas, ids = [], [], []
+        for i, doc in enumerate(documents):
+            contents.append(_get_content(doc))
+            metadatas.append(doc.metadata)
+            ids.append(doc.metadata.get("id", str(i)))
+        return contents, metadatas, ids
+    
+    def _get_keyword_index(self) -> KeywordIndex:
+        """
+        Get the keyword index, loading it from disk or building it on first use.
+        
+        Indexes of named collections are shared by every retriever in the process;
+        stores without a known collection name keep a per-retriever index.
+        """
+        collection = self._collection_name()
+        
+        # Concurrent searches in worker threads must not build the index twice
+        if collection is None:
+            with self._keyword_index_lock:
+                if self._keyword_index is None or self._keyword_index_stale:
+                    self._keyword_index = self._load_keyword_index(rebuild=self._keyword_index_stale)
+                    self._keyword_index_stale = False
+                return self._keyword_index
+        
+        with _keyword_indexes_lock:
+            stale = collection in _stale_keyword_indexes
+            if collection not in _keyword_indexes or stale:
+                _keyword_indexes[collection] = self._load_keyword_index(rebuild=stale)
+                _stale_keyword_indexes.discard(collection)
+            return _keyword_indexes[collection]
+    
+    def _load_keyword_index(self, rebuild: bool = False) -> KeywordIndex:
+        """Load the persisted keyword index, or build it from the store if missing or `rebuild`."""
+        if self.index_path and os.path.exists(self.index_path) and not rebuild:
+            return KeywordIndex.load(self.index_path)
+        
+        contents, metadatas, ids = self._load_corpus()
+        index = KeywordIndex().build(contents, metadatas, ids)
+        if self.index_path:
+            index.save(self.index_path)
+        return index
+    
+    def _get_dense_index(self) -> Optional[DenseIndex]:
+        """Get the dense index, building it from the embeddings sidecar on first use."""
+        with self._dense_index_lock:
+            if self._dense_index is None or self._dense_index_stale:
+                corpus = self._get_keyword_index()
                 
-                if score > 0:
-                    matched_docs.append({
-                        "content": doc.page_content if hasattr(doc, "page_content") else doc.text,
-                        "metadata": doc.metadata,
-                        "score": score
-                    })
+                with _sidecar_lock:
+                    # Documents ingested outside this retriever get their vectors copied in
+                    ids_path = os.path.splitext(self.embeddings_path)[0] + ".ids.json"
+                    stored = set()
+                    if os.path.exists(self.embeddings_path) and os.path.exists(ids_path):
+                        with open(ids_path, "r", encoding="utf-8") as f:
+                            stored = set(json.load(f))
+                    missing = [doc_id for doc_id in corpus.ids if doc_id not in stored]
+                    if missing and self.embeddings_path not in _sidecar_export_failures:
+                        self._append_embeddings(missing)
+                    if not os.path.exists(self.embeddings_path):
+                        return None
+                    
+                    self._dense_index = DenseIndex.from_sidecar(
+                        self.embeddings_path,
+                        corpus.contents,
+                        corpus.metadatas,
+                        corpus.ids,
+                        quantize=self.quantize
+                    )
+                self._dense_index_stale = False
+            return self._dense_index
+    
+    def rebuild_keyword_index(self) -> KeywordIndex:
+        """
+        Rebuild the keyword index from the current vector store contents.
+        
+        Call this after ingesting documents through the vector store directly.
+        
+        Returns:
+            The rebuilt keyword index
+        """
+        collection = self._collection_name()
+        if collection is not None:
+            invalidate_keyword_indexes(collection)
+        else:
+            self._keyword_index_stale = True
+        return self._get_keyword_index()
+    
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Add documents to the vector store, embedding only those not already stored.
+        
+        Documents are identified by `ids`, then by their metadata "id", then by a
+        hash of their content, so re-ingesting the same corpus embeds nothing.
+        
+        Args:
+            texts: Document texts
+            metadatas: Optional metadata for each document
+            ids: Optional ID for each document
+            
+        Returns:
+            IDs of the documents that were added
+        """
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        if ids is None:
+            ids = [
+                metadata.get("id") or hashlib.sha1(text.encode("utf-8")).hexdigest()
+                for text, metadata in zip(texts, metadatas)
+            ]
+        
+        # Only embed documents whose IDs are not in the store (or earlier in this batch)
+        seen = self._get_existing_ids(ids)
+        new_rows = []
+        for i, doc_id in enumerate(ids):
+            if doc_id not in seen:
+                seen.add(doc_id)
+                new_rows.append(i)
+        
+        if not new_rows:
+            return []
+        
+        new_ids = [ids[i] for i in new_rows]
+        
+        # Each slice is embedded in one batched encoder call and written in one request
+        for start in range(0, len(new_rows), self.embedding_batch_size):
+            rows = new_rows[start:start + self.embedding_batch_size]
+            self.vector_store.add_texts(
+                [texts[i] for i in rows],
+                metadatas=[metadatas[i] for i in rows],
+                ids=[ids[i] for i in rows]
+            )
+        logger.info(f"Added {len(new_ids)} documents ({len(ids) - len(new_ids)} already stored)")
+        
+        # The keyword and dense indexes are rebuilt on their next search
+        collection = self._collection_name()
+        if collection is not None:
+            invalidate_keyword_indexes(collection)
+        self._keyword_index_stale = True
+        self._dense_index_stale = True
+        
+        # Cached results no longer reflect the corpus
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
+        self._clear_misses()
+        
+        if self.embeddings_path:
+            self._append_embeddings(new_ids)
+        
+        return new_ids
+    
+    def _get_existing_ids(self, ids: List[str]) -> set:
+        """Get the subset of IDs already present in the vector store."""
+        try:
+            return set(self.vector_store.get(ids=ids).get("ids") or [])
+        except Exception:
+            # Stores without ID lookup are treated as not containing the documents
+            return set()
+    
+    def _append_embeddings(self, ids: List[str]) -> None:
+        """Append stored embeddings for `ids`, L2-normalized, to the .npy sidecar."""
+        try:
+            result = self.vector_store.get(ids=ids, include=["embeddings"])
+        except Exception as e:
+            # Not retried for this sidecar: the store cannot export its vectors
+            logger.warning(f"Could not read embeddings for sidecar, dense index disabled: {str(e)}")
+            _sidecar_export_failures.add(self.embeddings_path)
+            return
+        
+        embeddings = result.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            logger.warning(f"Store returned no embeddings for {len(ids)} documents, sidecar unchanged")
+            return
+        
+        # Normalized once here, so cosine similarity is a plain dot product at query time
+        vectors = normalize_rows(embeddings)
+        row_ids = list(result["ids"])
+        if vectors.ndim != 2 or len(vectors) != len(row_ids):
+            raise ValueError(
+                f"Store returned {len(vectors)} embeddings for {len(row_ids)} documents; "
+                f"cannot append them to {self.embeddings_path}"
+            )
+        ids_path = os.path.splitext(self.embeddings_path)[0] + ".ids.json"
+        
+        with _sidecar_lock:
+            if os.path.exists(self.embeddings_path) and os.path.exists(ids_path):
+                existing = np.load(self.embeddings_path)
+                if existing.ndim != 2 or existing.shape[1] != vectors.shape[1]:
+                    raise ValueError(
+                        f"Embedding width {vectors.shape[1]} does not match the {existing.shape[-1]}-wide "
+                        f"vectors in {self.embeddings_path}; was the embeddings model changed? "
+                        f"Delete the sidecar to rebuild it"
+                    )
+                # Sidecars written by older versions may hold float64 rows
+                vectors = np.concatenate([existing.astype(np.float32, copy=False), vectors])
+                with open(ids_path, "r", encoding="utf-8") as f:
+                    row_ids = json.load(f) + row_ids
             
-            # Sort by score and return top-k
-            matched_docs.sort(key=lambda x: x["score"], reverse=True)
-            return matched_docs[:k]
+            # Write to temporary files and swap them in: dense indexes may have the old
+            # sidecar memory-mapped, and truncating it in place would invalidate their pages.
+            # Vectors go first, so a reader never sees more IDs than rows
+            os.makedirs(os.path.dirname(self.embeddings_path) or ".", exist_ok=True)
+            _replace_file(self.embeddings_path, lambda f: np.save(f, vectors))
+            _replace_file(ids_path, lambda f: json.dump(row_ids, f), mode="w")
     
     def _combine_results(
         self, 
-        vector_results: List[Dict[str, Any]], 
-        keyword_results: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
+        vector_results: List[SearchHit], 
+        keyword_results: List[SearchHit]
+    ) -> Tuple[List[SearchHit], np.ndarray, np.ndarray]:
         """
-        Combine and rerank results from vector and keyword search.
+        Align vector and keyword results on one row per document.
+        
+        Each retriever's results are collected as flat (ids, scores) arrays and
+        merged once with np.unique, rather than walking documents one at a time.
+        Scores are rescaled per retriever according to `fusion_method`.
         
         Args:
             vector_results: Results from vector search
             keyword_results: Results from keyword search
             
         Returns:
-            Combined and reranked results
+            The distinct documents, with their vector and keyword score arrays
+            (zero where a retriever didn't return the document)
         """
-        # Create a dictionary to track combined results
-        combined_dict = {}
-        
         # Helper function to get a unique document ID
-        def _get_document_id(doc):
-            if "id" in doc.get("metadata", {}):
-                return doc["metadata"]["id"]
+        def _get_document_id(hit: SearchHit) -> str:
+            if "id" in hit.metadata:
+                return str(hit.metadata["id"])
             else:
                 # Create a simple hash if no ID exists
-                return hash(doc["content"][:100])
-        
-        # Process vector results
-        for result in vector_results:
-            doc_id = _get_document_id(result)
-            combined_dict[doc_id] = {
-                "content": result["content"],
-                "metadata": result["metadata"],
-                "vector_score": result["score"],
-                "keyword_score": 0.0
-            }
-        
-        # Process keyword results
-        for result in keyword_results:
-            doc_id = _get_document_id(result)
-            if doc_id in combined_dict:
-                combined_dict[doc_id]["keyword_score"] = result["score"]
-            else:
-                combined_dict[doc_id] = {
-                    "content": result["content"],
-                    "metadata": result["metadata"],
-                    "vector_score": 0.0,
-                    "keyword_score": result["score"]
-                }
+                return f"#{hash(hit.content[:100])}"
         
-        # Calculate combined scores
-        results = []
-        for doc_id, data in combined_dict.items():
-            combined_score = (
-                data["vector_score"] * self.vector_weight +
-                data["keyword_score"] * self.bm25_weight
-            )
-            
-            results.append({
-                "content": data["content"],
-                "metadata": data["metadata"],
-                "score": combined_score,
-                "vector_score": data["vector_score"],
-                "keyword_score": data["keyword_score"]
-            })
-        
-        # Sort by combined score (descending)
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results
+        hits = vector_results + keyword_results
+        ids = np.array([_get_document_id(hit) for hit in hits], dtype=str)
+        scores = np.fromiter((hit.score for hit in hits), dtype=np.float32, count=len(hits))
+        
+        unique_ids, first, inverse = np.unique(ids, return_index=True, return_inverse=True)
+        
+        # Keep documents in first-seen order (vector results first) so ties rank as before
+        order = np.argsort(first, kind="stable")
+        rows = np.empty_like(order)
+        rows[order] = np.arange(len(order))
+        inverse = rows[inverse.reshape(-1)]
+        
+        n_vector = len(vector_results)
+        vector_scores = np.zeros(len(unique_ids), dtype=np.float32)
+        keyword_scores = np.zeros(len(unique_ids), dtype=np.float32)
+        vector_scores[inverse[:n_vector]] = self._fusion_scores(scores[:n_vector])
+        keyword_scores[inverse[n_vector:]] = self._fusion_scores(scores[n_vector:])
+        
+        docs = [hits[i] for i in first[order]]
+        return docs, vector_scores, keyword_scores
+    
+    def _fusion_scores(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Put one retriever's scores (ordered best first) on the fusion scale.
+        
+        BM25 and cosine scores live on different scales, so by default they are
+        min-max normalized per retriever before weighting. Reciprocal rank fusion
+        ignores the raw scores and uses only each result's rank.
+        """
+        if len(scores) == 0 or self.fusion_method == "weighted":
+            return scores
+        
+        if self.fusion_method == "rrf":
+            return (1.0 / (self.rrf_k + np.arange(1, len(scores) + 1))).astype(np.float32)
+        
+        low, high = scores.min(), scores.max()
+        if high - low < 1e-9:
+            # All results scored alike (e.g. a single hit): treat them as full matches
+            return np.ones_like(scores)
+        return (scores - low) / (high - low)
     
     async def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a specific document by ID.
         
+        Lookups run in a worker thread so concurrent calls don't stall the event
+        loop. Found documents are kept in a process-wide LRU cache shared by the
+        retrievers of a collection, and recently missed IDs return None without
+        a store round trip until documents are added (through this retriever or
+        a store that calls `invalidate_document_cache`).
+        
         Args:
             document_id: The ID of the document to retrieve
             
         Returns:
             Document content and metadata, or None if not found
         """
-        # Implementation depends on how documents are stored
-        # This is a simplified placeholder
+        key = (self._document_scope(), document_id)
+        with _document_cache_lock:
+            document = _document_cache.get(key)
+            if document is not None:
+                _document_cache.move_to_end(key)
+                return dict(document)
+            if key in _miss_cache:
+                _miss_cache.move_to_end(key)
+                return None
+        
         try:
-            if hasattr(self.vector_store, "get_document"):
-                return await self.vector_store.get_document(document_id)
+            get_document = getattr(self.vector_store, "get_document", None)
+            if get_document is not None and asyncio.iscoroutinefunction(get_document):
+                document = await get_document(document_id)
             else:
-                # Fallback implementation
-                documents = self.vector_store.get()
-                for doc in documents:
-                    if doc.metadata.get("id") == document_id:
-                        return {
-                            "content": doc.page_content if hasattr(doc, "page_content") else doc.text,
-                            "metadata": doc.metadata
-                        }
-                return None
+                document = await asyncio.to_thread(self._lookup_document, document_id)
         except Exception as e:
             logger.error(f"Error retrieving document {document_id}: {str(e)}")
             return None
+        
+        with _document_cache_lock:
+            cache, size = (
+                (_document_cache, self.document_cache_size) if document is not None
+                else (_miss_cache, self.miss_cache_size)
+            )
+            cache[key] = document
+            while len(cache) > size:
+                cache.popitem(last=False)
+        return dict(document) if document is not None else None
+    
+    def _document_scope(self) -> Any:
+        """Get the document cache scope: the collection name, or a private scope if unknown."""
+        collection = self._collection_name()
+        return collection if collection is not None else self._cache_scope
+    
+    def _clear_misses(self) -> None:
+        """Forget missed document IDs in this retriever's scope (documents were added)."""
+        scope = self._document_scope()
+        with _document_cache_lock:
+            for key in [key for key in _miss_cache if key[0] == scope]:
+                del _miss_cache[key]
+    
+    def _lookup_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a document in the vector store by store ID or metadata "id" (blocking)."""
+        if hasattr(self.vector_store, "get_document"):
+            return self.vector_store.get_document(document_id)
+        
+        # Chroma returns column-oriented results; try the store ID, then the metadata ID
+        result = None
+        for lookup in ({"ids": [document_id]}, {"where": {"id": document_id}}):
+            try:
+                result = self.vector_store.get(**lookup)
+            except TypeError:
+                continue
+            if not isinstance(result, dict):
+                break
+            if result.get("ids"):
+                return {
+                    "content": result["documents"][0],
+                    "metadata": (result.get("metadatas") or [{}])[0] or {}
+                }
+        if isinstance(result, dict):
+            return None
+        
+        # Other stores return document lists, which are scanned
+        for doc in self.vector_store.get():
+            if doc.metadata.get("id") == document_id:
+                return {
+                    "content": _get_content(doc),
+                    "metadata": doc.metadata
+                }
+        return None
@@ -0,0 +1,274 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import os
+import pickle
+import re
+from collections import Counter
+import numpy as np
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Word characters plus combining diacritics, so decomposed (NFD) Vietnamese
+# text still yields whole syllables
+_WORD_RE = re.compile(r"[\w\u0300-\u036f]+")
+
+# Bumped whenever tokenization changes, so persisted indexes are rebuilt
+_TOKENIZER_VERSION = 2
+
+try:
+    from src.rag.retrieval._bm25_core import bm25_accumulate as _bm25_native
+except ImportError:  # the Cython extension is optional (built by setup.py when Cython is installed)
+    _bm25_native = None
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; BM25 then scores with NumPy
+    njit = None
+
+def _bm25_accumulate(
+    term_ids: np.ndarray,
+    idf: np.ndarray,
+    postings_idx: np.ndarray,
+    postings_docs: np.ndarray,
+    postings_tf: np.ndarray,
+    doc_len: np.ndarray,
+    k1: float,
+    b: float,
+    avgdl: float,
+    scores: np.ndarray
+) -> None:
+    """Add the BM25 contribution of each query term to `scores` (CSR postings)."""
+    for term in term_ids:
+        weight = idf[term]
+        for p in range(postings_idx[term], postings_idx[term + 1]):
+            doc = postings_docs[p]
+            tf = postings_tf[p]
+            norm = k1 * (1.0 - b + b * doc_len[doc] / avgdl)
+            scores[doc] += weight * tf * (k1 + 1.0) / (tf + norm)
+
+# Prefer the prebuilt Cython kernel, else compile with numba on first use (cached
+# on disk); query terms are scored serially because parallel terms would race
+# on shared documents
+if _bm25_native is not None:
+    _bm25_kernel = _bm25_native
+elif njit is not None:
+    _bm25_kernel = njit(cache=True, fastmath=True, nogil=True)(_bm25_accumulate)
+else:
+    _bm25_kernel = None
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Get the indices of the k highest scores, best first.
+    
+    Uses a partial sort (argpartition, O(n)) and orders only the k winners,
+    instead of sorting every score.
+    
+    Args:
+        scores: 1-D array of scores
+        k: Number of indices to return
+    
+    Returns:
+        Indices of the top scores; ties keep their original order
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.intp)
+    
+    top = np.arange(len(scores))
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+def filter_mask(metadatas: List[Dict[str, Any]], filters: Dict[str, Any]) -> np.ndarray:
+    """
+    Get a boolean mask of the documents whose metadata matches every filter.
+    
+    Args:
+        metadatas: Metadata for each document
+        filters: Metadata filters (exact match on each key)
+    
+    Returns:
+        Boolean array with one entry per document
+    """
+    return np.fromiter(
+        (all(metadata.get(key) == value for key, value in filters.items())
+         for metadata in metadatas),
+        dtype=bool,
+        count=len(metadatas)
+    )
+
+class KeywordIndex:
+    """
+    BM25 inverted index over a document corpus.
+    
+    The index is built once at corpus load (token -> posting list), so a query
+    only touches the posting lists of its own terms instead of scanning every
+    document. Posting lists are stored as flat CSR arrays, scored by a
+    compiled loop (the Cython extension, or numba) when available.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty keyword index.
+        
+        Args:
+            k1: BM25 term-frequency saturation parameter
+            b: BM25 document-length normalization parameter
+        """
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.contents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.postings_idx = np.zeros(1, dtype=np.int64)
+        self.postings_docs = np.zeros(0, dtype=np.int32)
+        self.postings_tf = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.avgdl = 0.0
+        self.tokenizer_version = _TOKENIZER_VERSION
+    
+    def __len__(self) -> int:
+        return len(self.contents)
+    
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """
+        Split text into case-folded words, dropping punctuation.
+        
+        Case folding (rather than lower()) also matches non-ASCII case variants,
+        including Vietnamese letters, and "nam," or "nam." index as "nam".
+        Document text is tokenized exactly once, when the index is built.
+        """
+        return _WORD_RE.findall(text.casefold())
+    
+    def build(
+        self,
+        contents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
+    ) -> "KeywordIndex":
+        """
+        Build the inverted index from a corpus.
+        
+        Args:
+            contents: Document texts
+            metadatas: Optional metadata for each document
+            ids: Optional ID for each document
+        
+        Returns:
+            The index itself
+        """
+        self.contents = list(contents)
+        self.metadatas = list(metadatas) if metadatas else [{} for _ in contents]
+        self.ids = list(ids) if ids else [str(i) for i in range(len(contents))]
+        
+        inverted: Dict[str, List[Tuple[int, int]]] = {}
+        doc_len = np.zeros(len(self.contents), dtype=np.float32)
+        
+        for doc_idx, content in enumerate(self.contents):
+            tokens = self.tokenize(content)
+            doc_len[doc_idx] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                inverted.setdefault(term, []).append((doc_idx, tf))
+        
+        # Flatten posting lists into CSR arrays: term t owns postings_idx[t]:postings_idx[t + 1]
+        self.vocabulary = {term: term_id for term_id, term in enumerate(inverted)}
+        lengths = np.fromiter((len(posting) for posting in inverted.values()), dtype=np.int64, count=len(inverted))
+        self.postings_idx = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        nnz = int(self.postings_idx[-1])
+        self.postings_docs = np.fromiter(
+            (doc_idx for posting in inverted.values() for doc_idx, _ in posting), dtype=np.int32, count=nnz
+        )
+        self.postings_tf = np.fromiter(
+            (tf for posting in inverted.values() for _, tf in posting), dtype=np.float32, count=nnz
+        )
+        n_docs = len(self.contents)
+        self.idf = np.log1p((n_docs - lengths + 0.5) / (lengths + 0.5)).astype(np.float32)
+        self.doc_len = doc_len
+        self.avgdl = float(doc_len.mean()) if len(doc_len) else 0.0
+        
+        logger.info(f"Built keyword index with {len(self.contents)} documents and {len(self.vocabulary)} terms")
+        return self
+    
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        terms: Optional[Sequence[str]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Score documents against a query with BM25.
+        
+        Args:
+            query: The search query
+            k: Number of results to return
+            filters: Optional metadata filters (exact match on each key)
+            terms: Already tokenized query terms, used instead of tokenizing `query`
+        
+        Returns:
+            List of (document index, score) pairs, best first. Scores are scaled
+            so the best match is 1.0.
+        """
+        n_docs = len(self.contents)
+        if n_docs == 0 or k <= 0:
+            return []
+        
+        scores = np.zeros(n_docs, dtype=np.float32)
+        term_ids = np.fromiter(
+            {
+                self.vocabulary[term]
+                for term in (terms if terms is not None else self.tokenize(query))
+                if term in self.vocabulary
+            },
+            dtype=np.int64
+        )
+        avgdl = max(self.avgdl, 1e-9)
+        
+        if _bm25_kernel is not None:
+            _bm25_kernel(
+                term_ids, self.idf, self.postings_idx, self.postings_docs, self.postings_tf,
+                self.doc_len, float(self.k1), float(self.b), avgdl, scores
+            )
+        else:
+            for term in term_ids:
+                span = slice(self.postings_idx[term], self.postings_idx[term + 1])
+                # A document appears at most once per posting list, so plain fancy adds are safe
+                doc_ids, tf = self.postings_docs[span], self.postings_tf[span]
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[doc_ids] / avgdl)
+                scores[doc_ids] += self.idf[term] * tf * (self.k1 + 1.0) / (tf + norm)
+        
+        if filters:
+            scores[~filter_mask(self.metadatas, filters)] = 0.0
+        
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) == 0:
+            return []
+        
+        # Partial sort: only the k best candidates are ordered
+        candidates = candidates[top_k_indices(scores[candidates], k)]
+        
+        best = float(scores[candidates[0]])
+        return [(int(doc_idx), float(scores[doc_idx]) / best) for doc_idx in candidates]
+    
+    def save(self, path: str) -> None:
+        """Persist the index to disk so restarts don't rebuild it."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @classmethod
+    def load(cls, path: str) -> "KeywordIndex":
+        """Load an index previously written with `save`."""
+        index = cls()
+        with open(path, "rb") as f:
+            index.__dict__.update(pickle.load(f))
+        
+        # Indexes saved with an older layout or tokenizer are rebuilt from their corpus
+        if "postings" in index.__dict__ or index.__dict__.get("tokenizer_version") != _TOKENIZER_VERSION:
+            index.__dict__.pop("postings", None)
+            index.tokenizer_version = _TOKENIZER_VERSION
+            index.build(index.contents, index.metadatas, index.ids)
+        return index
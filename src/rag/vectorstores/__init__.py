@@ -1,18 +1,29 @@
-from typing import Optional, Any
+from typing import Callable, Dict, Optional, Any, Set, Tuple
+import threading
 from langchain.embeddings.base import Embeddings
 from langchain.vectorstores import Chroma, Weaviate
 from langchain.schema.vectorstore import VectorStore
 
 from src.config.settings import settings
 from src.rag.embeddings import get_embeddings_model
+from src.rag.vectorstores.batching import BatchingVectorStore
+
+# Database clients are shared per (host, port) so HTTP connections are kept
+# alive across calls, and each Weaviate class is checked/created only once
+_CHROMA_CLIENTS: Dict[Tuple[str, int], Any] = {}
+_WEAVIATE_CLIENTS: Dict[Tuple[str, int], Any] = {}
+_WEAVIATE_SCHEMA_READY: Set[Tuple[str, int, str]] = set()
+_CLIENTS_LOCK = threading.Lock()
 
 def get_vector_store(
     vector_db_type: str,
     host: str,
     port: int,
     embeddings: Optional[Embeddings] = None,
-    collection_name: str = "documents"
-) -> VectorStore:
+    collection_name: str = "documents",
+    batch_size: int = 100,
+    on_ingest: Optional[Callable[[], None]] = None
+) -> BatchingVectorStore:
     """
     Factory function to get a vector store instance based on configuration.
     
@@ -22,19 +33,23 @@ def get_vector_store(
         port: Database port
         embeddings: Embeddings model to use
         collection_name: Name of the collection/table
+        batch_size: Number of documents written per ingest call
+        on_ingest: Optional callback run after documents are added through the store
         
     Returns:
-        Configured vector store instance
+        Configured vector store instance, wrapped to ingest in batches
     """
     if embeddings is None:
         embeddings = get_embeddings_model()
     
     if vector_db_type.lower() == "chroma":
-        return _get_chroma(host, port, embeddings, collection_name)
+        vector_store = _get_chroma(host, port, embeddings, collection_name)
     elif vector_db_type.lower() == "weaviate":
-        return _get_weaviate(host, port, embeddings, collection_name)
+        vector_store = _get_weaviate(host, port, embeddings, collection_name, batch_size)
     else:
         raise ValueError(f"Unsupported vector database type: {vector_db_type}")
+    
+    return BatchingVectorStore(vector_store, batch_size=batch_size, on_ingest=on_ingest)
 
 def _get_chroma(
     host: str,
@@ -46,12 +61,15 @@ def _get_chroma(
     from chromadb.config import Settings
     import chromadb
     
-    # Create a client
-    client = chromadb.HttpClient(
-        host=host,
-        port=port,
-        settings=Settings(anonymized_telemetry=False)
-    )
+    # Get or create the shared client
+    with _CLIENTS_LOCK:
+        client = _CHROMA_CLIENTS.get((host, port))
+        if client is None:
+            client = _CHROMA_CLIENTS[(host, port)] = chromadb.HttpClient(
+                host=host,
+                port=port,
+                settings=Settings(anonymized_telemetry=False)
+            )
     
     # Create or get collection
     return Chroma(
@@ -64,19 +82,27 @@ def _get_weaviate(
     host: str,
     port: int,
     embeddings: Embeddings,
-    collection_name: str
+    collection_name: str,
+    batch_size: int = 100
 ) -> Weaviate:
     """Get a Weaviate vector store instance."""
     import weaviate
     from weaviate.auth import AuthApiKey
     
-    # Create a client
-    client = weaviate.Client(
-        url=f"http://{host}:{port}"
-    )
+    # Get or create the shared client
+    with _CLIENTS_LOCK:
+        client = _WEAVIATE_CLIENTS.get((host, port))
+        if client is None:
+            client = _WEAVIATE_CLIENTS[(host, port)] = weaviate.Client(
+                url=f"http://{host}:{port}",
+                timeout_config=(5, 60)  # (connect, read) seconds
+            )
+            # Objects are flushed in dynamically sized batches from several workers
+            client.batch.configure(batch_size=batch_size, dynamic=True, num_workers=4)
     
-    # Define schema if it doesn't exist
-    if not client.schema.exists(collection_name):
+    # Define schema if it doesn't exist (checked once per process)
+    schema_key = (host, port, collection_name)
+    if schema_key not in _WEAVIATE_SCHEMA_READY and not client.schema.exists(collection_name):
         class_obj = {
             "class": collection_name,
             "vectorizer": "none",  # We'll provide our own vectors
@@ -92,6 +118,7 @@ def _get_weaviate(
             ]
         }
         client.schema.create_class(class_obj)
+    _WEAVIATE_SCHEMA_READY.add(schema_key)
     
     return Weaviate(
         client=client,
@@ -0,0 +1,100 @@
+from typing import Any, Callable, Iterable, List, Optional
+import asyncio
+from langchain.schema import Document
+from langchain.schema.vectorstore import VectorStore
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class BatchingVectorStore:
+    """
+    Vector store wrapper that ingests documents in fixed-size batches.
+    
+    Each batch is written with a single call to the underlying store, so large
+    ingests cost one round trip per batch rather than per document, while no
+    single request grows unbounded. All other attributes and methods are
+    delegated to the wrapped store unchanged.
+    """
+    
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        batch_size: int = 100,
+        on_ingest: Optional[Callable[[], None]] = None
+    ):
+        """
+        Initialize the wrapper.
+        
+        Args:
+            vector_store: The vector store to wrap
+            batch_size: Number of documents written per call
+            on_ingest: Optional callback run after documents are added (e.g. to
+                invalidate caches of search results)
+        """
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.on_ingest = on_ingest
+    
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not defined on the wrapper itself
+        if name == "vector_store":
+            raise AttributeError(name)
+        return getattr(self.vector_store, name)
+    
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """
+        Add texts to the underlying store in batches.
+        
+        Args:
+            texts: Document texts
+            metadatas: Optional metadata for each document
+            ids: Optional ID for each document
+            **kwargs: Extra arguments passed through to the store
+        
+        Returns:
+            IDs of the added documents
+        """
+        texts = list(texts)
+        added_ids: List[str] = []
+        
+        for start in range(0, len(texts), self.batch_size):
+            end = start + self.batch_size
+            batch_kwargs = dict(kwargs)
+            if metadatas is not None:
+                batch_kwargs["metadatas"] = metadatas[start:end]
+            if ids is not None:
+                batch_kwargs["ids"] = ids[start:end]
+            added_ids.extend(self.vector_store.add_texts(texts[start:end], **batch_kwargs))
+        
+        logger.info(f"Added {len(texts)} documents in {-(-len(texts) // self.batch_size)} batches")
+        if self.on_ingest is not None and texts:
+            self.on_ingest()
+        return added_ids
+    
+    def add_documents(self, documents: List[Document], **kwargs: Any) -> List[str]:
+        """Add LangChain documents to the underlying store in batches."""
+        return self.add_texts(
+            [doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+            **kwargs
+        )
+    
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Add texts in batches without blocking the event loop."""
+        return await asyncio.to_thread(self.add_texts, list(texts), metadatas, **kwargs)
+    
+    async def aadd_documents(self, documents: List[Document], **kwargs: Any) -> List[str]:
+        """Add LangChain documents in batches without blocking the event loop."""
+        return await asyncio.to_thread(self.add_documents, documents, **kwargs)
@@ -1,7 +1,11 @@
+import atexit
 import logging
 import os
+import queue
 import sys
-from typing import Optional
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # Configure basic logging
@@ -16,6 +20,90 @@ os.makedirs(LOG_DIR, exist_ok=True)
 # Configure formatter
 formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
 
+# Loggers only enqueue records; a background listener thread owns the console
+# and file handlers, so logging never blocks the caller (or the event loop) on I/O.
+# Each record is tagged with the name of the handler set that should emit it.
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_target_handlers: Dict[str, List[logging.Handler]] = {}
+
+class _TargetQueueHandler(QueueHandler):
+    """Queue handler that tags records with the handler set to emit them."""
+    
+    def __init__(self, target: str):
+        super().__init__(_log_queue)
+        self.target = target
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.log_target = self.target
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # The current process's queue (replaced after a fork), drained by its listener
+        if _listener is None:
+            start_log_listener()
+        _log_queue.put_nowait(record)
+
+class _TargetRouter(logging.Handler):
+    """Listener-side handler that dispatches records to their target's handlers."""
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        for handler in _target_handlers.get(getattr(record, "log_target", ""), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+# The listener thread is started on first use rather than at import, and a
+# forked child gets a fresh queue and listener (threads do not survive a fork)
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+def start_log_listener() -> None:
+    """Start the background thread that emits queued log records (idempotent)."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            listener = QueueListener(_log_queue, _TargetRouter())
+            listener.start()
+            _listener = listener
+
+def stop_log_listener() -> None:
+    """Emit any queued log records and stop the background thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def _reset_after_fork() -> None:
+    """Give a forked child its own queue; its listener starts with the next record."""
+    global _log_queue, _listener, _listener_lock
+    _log_queue = queue.Queue(-1)
+    _listener = None
+    _listener_lock = threading.Lock()
+
+atexit.register(stop_log_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _attach_handlers(
+    logger: logging.Logger,
+    target: str,
+    handlers: List[logging.Handler],
+    level: int
+) -> None:
+    """Route a logger through the queue to `handlers`, replacing any previous ones."""
+    for old_handler in _target_handlers.get(target, ()):
+        old_handler.close()
+    _target_handlers[target] = handlers
+    
+    queue_handler = _TargetQueueHandler(target)
+    queue_handler.setLevel(level)
+    logger.addHandler(queue_handler)
+
+# Loggers configured by get_logger, so handlers are set up once per name
+_LOGGERS: Dict[str, logging.Logger] = {}
+_LOGGERS_LOCK = threading.Lock()
+
 def get_logger(name: str, log_level: Optional[str] = None) -> logging.Logger:
     """
     Get a configured logger instance.
@@ -27,21 +115,30 @@ def get_logger(name: str, log_level: Optional[str] = None) -> logging.Logger:
     Returns:
         Configured logger instance
     """
-    logger = logging.getLogger(name)
-    
-    # Set log level
     level = getattr(logging, log_level or LOG_LEVEL)
-    logger.setLevel(level)
     
-    # Clear existing handlers to avoid duplicates
-    if logger.handlers:
-        logger.handlers.clear()
+    with _LOGGERS_LOCK:
+        logger = _LOGGERS.get(name)
+        if logger is not None:
+            if log_level:
+                logger.setLevel(level)
+                for handler in logger.handlers + _target_handlers.get(name, []):
+                    handler.setLevel(level)
+            return logger
+        
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        _configure_logger_handlers(logger, name, level)
+        _LOGGERS[name] = logger
     
+    return logger
+
+def _configure_logger_handlers(logger: logging.Logger, name: str, level: int) -> None:
+    """Create the console and file handlers for a named logger."""
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
     
     # Create file handler for this logger
     today = datetime.now().strftime("%Y-%m-%d")
@@ -50,9 +147,8 @@ def get_logger(name: str, log_level: Optional[str] = None) -> logging.Logger:
     file_handler = logging.FileHandler(log_file)
     file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
     
-    return logger
+    _attach_handlers(logger, name, [console_handler, file_handler], level)
 
 def setup_global_logging(log_level: Optional[str] = None):
     """
@@ -75,7 +171,6 @@ def setup_global_logging(log_level: Optional[str] = None):
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
     
     # Add file handler to root logger
     today = datetime.now().strftime("%Y-%m-%d")
@@ -84,4 +179,7 @@ def setup_global_logging(log_level: Optional[str] = None):
     file_handler = logging.FileHandler(log_file)
     file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
+    
+    # The "" target is reserved for the root logger (logger names are never empty)
+    _attach_handlers(root_logger, "", [console_handler, file_handler], level)
+    start_log_listener()
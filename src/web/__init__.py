@@ -1,9 +1,11 @@
 """Web scraping and search components."""
 
-from src.web.search import web_search, fetch_webpage_content, enrich_search_results
+from src.web.search import web_search, fetch_webpage_content, enrich_search_results, search_and_enrich, close_session
 
 __all__ = [
     "web_search", 
     "fetch_webpage_content", 
-    "enrich_search_results"
+    "enrich_search_results",
+    "search_and_enrich",
+    "close_session"
 ]
@@ -1,7 +1,7 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Union
 import aiohttp
 import asyncio
-import json
+import orjson
 import re
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, parse_qs
@@ -11,6 +11,118 @@ from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Shared HTTP session, created lazily on first use so DNS lookups, TLS
+# handshakes and keep-alive connections are reused across requests
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Cache lifetimes (seconds) for the HTTP response cache; search results
+# expire sooner so trending queries stay fresh
+HTTP_CACHE_EXPIRE_AFTER = 3600
+SEARCH_CACHE_EXPIRE_AFTER = 300
+
+def _accept_encoding() -> str:
+    """Get the Accept-Encoding header, offering Brotli only when it can be decoded."""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        return "gzip, deflate"
+
+def _cacheable_response(response: aiohttp.ClientResponse) -> bool:
+    """
+    Decide whether a response may be written to the HTTP cache.
+    
+    Caching reads the whole body, so pages are only cached when their declared
+    length is within MAX_PAGE_BYTES; SerpAPI results are small JSON documents.
+    """
+    if response.url.host and response.url.host.endswith("serpapi.com"):
+        return True
+    content_length = getattr(response, "content_length", None)
+    return content_length is not None and content_length <= MAX_PAGE_BYTES
+
+def _create_session(connector: aiohttp.TCPConnector) -> aiohttp.ClientSession:
+    """
+    Create a client session, backed by an HTTP response cache when available.
+    
+    The cache honors Cache-Control and revalidates with ETag/Last-Modified, so
+    repeated fetches of the same search or page are served locally or as 304s.
+    """
+    headers = {"Accept-Encoding": _accept_encoding()}
+    
+    if settings.HTTP_CACHE_PATH:
+        try:
+            from aiohttp_client_cache import CachedSession, SQLiteBackend
+            
+            cache = SQLiteBackend(
+                cache_name=settings.HTTP_CACHE_PATH,
+                expire_after=HTTP_CACHE_EXPIRE_AFTER,
+                urls_expire_after={"serpapi.com": SEARCH_CACHE_EXPIRE_AFTER},
+                allowed_codes=(200,),
+                cache_control=True,
+                # Keep the SerpAPI key out of cache keys and skip oversized bodies
+                ignored_params=["api_key"],
+                filter_fn=_cacheable_response
+            )
+            return CachedSession(cache=cache, connector=connector, headers=headers)
+        except ImportError:
+            logger.warning("aiohttp-client-cache is not installed, HTTP responses will not be cached")
+    
+    return aiohttp.ClientSession(connector=connector, headers=headers)
+
+def _discard_session(session: aiohttp.ClientSession, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """
+    Release a session created on another event loop.
+    
+    Its connections can only be closed on the loop that owns them: the close is
+    scheduled there if that loop is still running. Otherwise the connector is
+    detached, so the session reports closed and its sockets are freed with it.
+    """
+    if session.closed:
+        return
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+    else:
+        session.detach()
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Get the shared client session, creating it on first use."""
+    global _session, _session_loop
+    
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        if _session is not None:
+            _discard_session(_session, _session_loop)
+        connector = aiohttp.TCPConnector(
+            limit=50,
+            limit_per_host=10,
+            ttl_dns_cache=300,
+            keepalive_timeout=30
+        )
+        _session = _create_session(connector)
+        _session_loop = loop
+    
+    return _session
+
+# Class names that usually mark a page's main content
+_CONTENT_CLASS_RE = re.compile(r"content|article|post")
+
+# Largest page body read into memory; longer pages are truncated
+MAX_PAGE_BYTES = 2_000_000
+
+# Bounds on concurrent page fetches when enriching search results
+ENRICH_CONCURRENCY = 10
+ENRICH_PER_HOST_CONCURRENCY = 2
+
+async def close_session() -> None:
+    """Close the shared client session (call on application shutdown)."""
+    global _session, _session_loop
+    
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
 async def web_search(
     query: str,
     num_results: int = 5,
@@ -53,27 +165,27 @@ async def web_search(
     
     try:
         # Make API request
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://serpapi.com/search", params=params) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"SerpAPI error: {response.status} - {error_text}")
-                    return _mock_search_results(query, num_results)
-                
-                data = await response.json()
-                
-                # Extract organic results
-                results = []
-                if "organic_results" in data:
-                    for result in data["organic_results"][:num_results]:
-                        results.append({
-                            "title": result.get("title", ""),
-                            "url": result.get("link", ""),
-                            "snippet": result.get("snippet", ""),
-                            "position": result.get("position", 0)
-                        })
-                
-                return results
+        session = await _get_session()
+        async with session.get("https://serpapi.com/search", params=params) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"SerpAPI error: {response.status} - {error_text}")
+                return _mock_search_results(query, num_results)
+            
+            data = orjson.loads(await response.read())
+            
+            # Extract organic results
+            results = []
+            if "organic_results" in data:
+                for result in data["organic_results"][:num_results]:
+                    results.append({
+                        "title": result.get("title", ""),
+                        "url": result.get("link", ""),
+                        "snippet": result.get("snippet", ""),
+                        "position": result.get("position", 0)
+                    })
+            
+            return results
     except Exception as e:
         logger.error(f"Web search error: {str(e)}")
         return _mock_search_results(query, num_results)
@@ -94,12 +206,60 @@ def _mock_search_results(query: str, num_results: int = 5) -> List[Dict[str, Any
     
     return results
 
-async def fetch_webpage_content(url: str) -> Dict[str, Any]:
+def _extract_page_content(html: str) -> Dict[str, Any]:
+    """
+    Extract the title, main content and description from an HTML page.
+    
+    Uses the lxml parser, whose C tokenizer is several times faster than
+    the pure-Python html.parser on typical pages.
+    
+    Args:
+        html: Raw HTML
+        
+    Returns:
+        Dictionary with title, content, description and word count
+    """
+    soup = BeautifulSoup(html, "lxml")
+    
+    # Remove script, style and navigation elements (and free their subtrees)
+    for element in soup(["script", "style", "nav", "footer", "header"]):
+        element.decompose()
+    
+    # Extract title
+    title = soup.title.string if soup.title else ""
+    
+    # Extract main content
+    main_content = ""
+    
+    # Try to find main content
+    main_elements = soup.find_all(["article", "main", "div"], class_=_CONTENT_CLASS_RE)
+    if main_elements:
+        for element in main_elements:
+            main_content += element.get_text(separator=" ", strip=True) + "\n\n"
+    else:
+        # Fallback to body
+        main_content = soup.body.get_text(separator=" ", strip=True) if soup.body else ""
+    
+    # Extract metadata
+    meta_description = ""
+    meta_tag = soup.find("meta", attrs={"name": "description"})
+    if meta_tag:
+        meta_description = meta_tag.get("content", "")
+    
+    return {
+        "title": title,
+        "content": main_content,
+        "description": meta_description,
+        "word_count": len(main_content.split())
+    }
+
+async def fetch_webpage_content(url: str, max_bytes: int = MAX_PAGE_BYTES) -> Dict[str, Any]:
     """
     Fetch and extract content from a webpage.
     
     Args:
         url: URL to fetch
+        max_bytes: Maximum number of body bytes to read
         
     Returns:
         Dictionary with extracted content and metadata
@@ -109,61 +269,38 @@ async def fetch_webpage_content(url: str) -> Dict[str, Any]:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status != 200:
-                    return {
-                        "url": url,
-                        "success": False,
-                        "error": f"HTTP Error: {response.status}"
-                    }
-                
-                content_type = response.headers.get("Content-Type", "")
-                
-                # Handle only HTML content
-                if "text/html" not in content_type:
-                    return {
-                        "url": url,
-                        "success": False,
-                        "error": f"Not HTML content: {content_type}"
-                    }
-                
-                html = await response.text()
-                soup = BeautifulSoup(html, "html.parser")
-                
-                # Remove script and style elements
-                for script in soup(["script", "style", "nav", "footer", "header"]):
-                    script.extract()
-                
-                # Extract title
-                title = soup.title.string if soup.title else ""
-                
-                # Extract main content
-                main_content = ""
-                
-                # Try to find main content
-                main_elements = soup.find_all(["article", "main", "div"], class_=re.compile("content|article|post"))
-                if main_elements:
-                    for element in main_elements:
-                        main_content += element.get_text(separator=" ", strip=True) + "\n\n"
-                else:
-                    # Fallback to body
-                    main_content = soup.body.get_text(separator=" ", strip=True) if soup.body else ""
-                
-                # Extract metadata
-                meta_description = ""
-                meta_tag = soup.find("meta", attrs={"name": "description"})
-                if meta_tag:
-                    meta_description = meta_tag.get("content", "")
-                
+        session = await _get_session()
+        async with session.get(url, headers=headers, timeout=10) as response:
+            if response.status != 200:
+                return {
+                    "url": url,
+                    "success": False,
+                    "error": f"HTTP Error: {response.status}"
+                }
+            
+            content_type = response.headers.get("Content-Type", "")
+            
+            # Handle only HTML content
+            if "text/html" not in content_type:
                 return {
                     "url": url,
-                    "success": True,
-                    "title": title,
-                    "content": main_content,
-                    "description": meta_description,
-                    "word_count": len(main_content.split())
+                    "success": False,
+                    "error": f"Not HTML content: {content_type}"
                 }
+            
+            # Stream the body so oversized pages are cut off instead of buffered
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(65536):
+                body.extend(chunk)
+                if len(body) >= max_bytes:
+                    logger.warning(f"Truncating {url} at {max_bytes} bytes")
+                    del body[max_bytes:]
+                    break
+            html = body.decode(response.charset or "utf-8", errors="replace")
+        
+        # Parsing is CPU-bound, so keep it off the event loop
+        page = await asyncio.to_thread(_extract_page_content, html)
+        return {"url": url, "success": True, **page}
     
     except Exception as e:
         logger.error(f"Error fetching {url}: {str(e)}")
@@ -173,6 +310,42 @@ async def fetch_webpage_content(url: str) -> Dict[str, Any]:
             "error": str(e)
         }
 
+def _bounded_fetcher() -> Callable[[str], Awaitable[Dict[str, Any]]]:
+    """
+    Create a page fetcher with global and per-host concurrency limits.
+    
+    Returns:
+        Coroutine function fetching one URL within the limits
+    """
+    global_limit = asyncio.Semaphore(ENRICH_CONCURRENCY)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    
+    async def bounded(url: str) -> Dict[str, Any]:
+        host = urlparse(url).netloc
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(ENRICH_PER_HOST_CONCURRENCY))
+        async with host_limit:
+            async with global_limit:
+                return await fetch_webpage_content(url)
+    
+    return bounded
+
+def _merge_content(result: Dict[str, Any], content_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine a search result with its fetched page content."""
+    if content_result["success"]:
+        return {
+            **result,
+            "full_content": content_result["content"],
+            "full_title": content_result.get("title", result["title"]),
+            "word_count": content_result.get("word_count", 0)
+        }
+    
+    # Keep original result if fetching failed
+    return {
+        **result,
+        "full_content": None,
+        "fetch_error": content_result.get("error")
+    }
+
 async def enrich_search_results(results: List[Dict[str, Any]], fetch_content: bool = True) -> List[Dict[str, Any]]:
     """
     Enrich search results with additional content.
@@ -187,29 +360,47 @@ async def enrich_search_results(results: List[Dict[str, Any]], fetch_content: bo
     if not fetch_content:
         return results
     
-    enriched_results = []
-    
-    # Fetch content for all results concurrently
-    tasks = [fetch_webpage_content(result["url"]) for result in results]
-    content_results = await asyncio.gather(*tasks)
+    # Fetch content for all results concurrently, within connection limits
+    fetch = _bounded_fetcher()
+    content_results = await asyncio.gather(*(fetch(result["url"]) for result in results))
     
     # Combine original results with fetched content
-    for i, result in enumerate(results):
-        content_result = content_results[i]
+    return [_merge_content(result, content_result) for result, content_result in zip(results, content_results)]
+
+async def search_and_enrich(
+    query: str,
+    num_results: int = 5,
+    language: str = "en",
+    region: Optional[str] = None,
+    safe_search: bool = True
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Search the web and stream each result enriched with its page content.
+    
+    Page fetches start as soon as the search returns, and each result is
+    yielded as soon as its page is fetched rather than after the slowest one.
+    
+    Args:
+        query: Search query
+        num_results: Number of results to return
+        language: Language code (e.g., 'en', 'vi')
+        region: Region code (e.g., 'us', 'vn')
+        safe_search: Whether to enable safe search
         
-        if content_result["success"]:
-            enriched_results.append({
-                **result,
-                "full_content": content_result["content"],
-                "full_title": content_result.get("title", result["title"]),
-                "word_count": content_result.get("word_count", 0)
-            })
-        else:
-            # Keep original result if fetching failed
-            enriched_results.append({
-                **result,
-                "full_content": None,
-                "fetch_error": content_result.get("error")
-            })
-    
-    return enriched_results
+    Yields:
+        Enriched search results, in completion order
+    """
+    results = await web_search(query, num_results, language, region, safe_search)
+    fetch = _bounded_fetcher()
+    
+    async def enrich(result: Dict[str, Any]) -> Dict[str, Any]:
+        return _merge_content(result, await fetch(result["url"]))
+    
+    tasks = [asyncio.create_task(enrich(result)) for result in results]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        # Stop outstanding fetches if the consumer stops early
+        for task in tasks:
+            task.cancel()
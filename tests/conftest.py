@@ -14,7 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.config.settings import settings
 from src.agents.coordinator import AgentCoordinator
 from src.rag.embeddings import get_embeddings_model
-from src.rag.vectorstores import get_vector_store
+from src.rag.vectorstores.batching import BatchingVectorStore
 from src.utils.logging import setup_global_logging
 
 # Configure test settings
@@ -47,21 +47,59 @@ def embeddings_model():
     """Provide an embeddings model for tests."""
     return get_embeddings_model()
 
-@pytest.fixture(scope="session")
+@pytest.fixture
 def vector_store(embeddings_model):
-    """Provide a vector store for tests."""
-    return get_vector_store(
-        embedding_model=embeddings_model,
+    """
+    Provide an empty in-memory vector store for each test.
+    
+    The embeddings model is shared across the session; only the collection is
+    recreated, which is cheap with Chroma's ephemeral client.
+    """
+    import chromadb
+    from chromadb.config import Settings
+    from langchain.vectorstores import Chroma
+    
+    client = chromadb.EphemeralClient(Settings(anonymized_telemetry=False, allow_reset=True))
+    store = Chroma(
+        client=client,
         collection_name="test_documents",
-        persist_directory="./tests/data/vectordb"
+        embedding_function=embeddings_model
+    )
+    yield BatchingVectorStore(store)
+    client.delete_collection("test_documents")
+
+@pytest.fixture(scope="session")
+def indexed_vector_store(embeddings_model, sample_documents):
+    """
+    Provide an in-memory vector store with the sample documents already indexed.
+    
+    Documents are embedded and written once per session; tests using this store
+    must not modify it (request `vector_store` for a mutable one).
+    """
+    import chromadb
+    from chromadb.config import Settings
+    from langchain.vectorstores import Chroma
+    
+    client = chromadb.EphemeralClient(Settings(anonymized_telemetry=False, allow_reset=True))
+    store = Chroma(
+        client=client,
+        collection_name="test_indexed_documents",
+        embedding_function=embeddings_model
+    )
+    store.add_texts(
+        [doc["content"] for doc in sample_documents],
+        metadatas=[doc["metadata"] for doc in sample_documents],
+        ids=[doc["metadata"]["id"] for doc in sample_documents]
     )
+    yield BatchingVectorStore(store)
+    client.delete_collection("test_indexed_documents")
 
 @pytest.fixture
 def sample_text_query():
     """Sample text query for testing."""
     return "Tìm kiếm thông tin về lịch sử Việt Nam"
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_documents():
     """Sample documents for testing the RAG system."""
     return [
@@ -0,0 +1,104 @@
+"""
+Tests for the in-process dense vector index.
+"""
+
+import json
+import numpy as np
+import pytest
+
+from src.rag.retrieval.dense_index import DenseIndex
+
+@pytest.fixture
+def document_vectors():
+    """Unnormalized toy embeddings, one per sample document."""
+    return np.array([[3.0, 0.0, 0.0], [0.0, 2.0, 0.0], [1.0, 1.0, 0.0]], dtype=np.float32)
+
+@pytest.fixture
+def dense_index(document_vectors, sample_documents):
+    """Provide a dense index built from the sample documents."""
+    return DenseIndex().build(
+        document_vectors,
+        [doc["content"] for doc in sample_documents],
+        [doc["metadata"] for doc in sample_documents],
+        [doc["metadata"]["id"] for doc in sample_documents]
+    )
+
+def test_dense_index_normalizes_vectors(dense_index):
+    """Test that stored vectors are unit-length float32."""
+    assert dense_index.vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(dense_index.vectors, axis=1), 1.0)
+
+def test_dense_index_search(dense_index):
+    """Test that results are ranked by cosine similarity."""
+    results = dense_index.search([2.0, 0.1, 0.0], k=2)
+    
+    assert [dense_index.ids[doc_idx] for doc_idx, _ in results] == ["doc1", "doc3"]
+    assert results[0][1] == pytest.approx(2.0 / np.hypot(2.0, 0.1), abs=1e-5)
+
+def test_dense_index_filters(dense_index):
+    """Test that filtered-out documents are never returned."""
+    results = dense_index.search([1.0, 0.0, 0.0], k=3, filters={"id": "doc2"})
+    
+    assert [dense_index.ids[doc_idx] for doc_idx, _ in results] == ["doc2"]
+
+def test_dense_index_from_sidecar(tmp_path, document_vectors, sample_documents):
+    """Test that sidecar rows are matched to the corpus by ID."""
+    embeddings_path = tmp_path / "embeddings.npy"
+    np.save(embeddings_path, document_vectors[::-1] / np.linalg.norm(document_vectors[::-1], axis=1, keepdims=True))
+    (tmp_path / "embeddings.ids.json").write_text(json.dumps(["doc3", "doc2", "doc1"]))
+    
+    index = DenseIndex.from_sidecar(
+        str(embeddings_path),
+        [doc["content"] for doc in sample_documents],
+        [doc["metadata"] for doc in sample_documents],
+        [doc["metadata"]["id"] for doc in sample_documents]
+    )
+    
+    results = index.search([0.0, 1.0, 0.0], k=1)
+    assert index.ids[results[0][0]] == "doc2"
+
+def test_dense_index_search_batch(dense_index):
+    """Test that batched search matches single-query search row by row."""
+    queries = np.array([[2.0, 0.1, 0.0], [0.0, 1.0, 0.5]], dtype=np.float32)
+    
+    results = dense_index.search_batch(queries, k=2)
+    
+    assert len(results) == 2
+    for query, batch_results in zip(queries, results):
+        expected = dense_index.search(query, k=2)
+        assert [doc_idx for doc_idx, _ in batch_results] == [doc_idx for doc_idx, _ in expected]
+        assert [score for _, score in batch_results] == pytest.approx([score for _, score in expected])
+
+def test_dense_index_sidecar_is_memory_mapped(tmp_path, document_vectors, sample_documents):
+    """Test that a sidecar matching the corpus is searched without loading a copy."""
+    embeddings_path = tmp_path / "embeddings.npy"
+    np.save(embeddings_path, document_vectors / np.linalg.norm(document_vectors, axis=1, keepdims=True))
+    (tmp_path / "embeddings.ids.json").write_text(json.dumps(["doc1", "doc2", "doc3"]))
+    
+    index = DenseIndex.from_sidecar(
+        str(embeddings_path),
+        [doc["content"] for doc in sample_documents],
+        [doc["metadata"] for doc in sample_documents],
+        [doc["metadata"]["id"] for doc in sample_documents]
+    )
+    
+    assert isinstance(index.vectors.base, np.memmap)
+    assert index.ids[index.search([1.0, 0.0, 0.0], k=1)[0][0]] == "doc1"
+
+def test_dense_index_int8_quantization(document_vectors, sample_documents):
+    """Test that an int8 index ranks like the float32 index with close scores."""
+    args = (
+        document_vectors,
+        [doc["content"] for doc in sample_documents],
+        [doc["metadata"] for doc in sample_documents],
+        [doc["metadata"]["id"] for doc in sample_documents]
+    )
+    exact = DenseIndex().build(*args)
+    quantized = DenseIndex().build(*args, quantize="int8")
+    
+    assert quantized.codes.dtype == np.int8
+    for query in ([2.0, 0.1, 0.0], [0.3, 1.0, 0.2]):
+        expected = exact.search(query, k=3)
+        results = quantized.search(query, k=3)
+        assert [doc_idx for doc_idx, _ in results] == [doc_idx for doc_idx, _ in expected]
+        assert [score for _, score in results] == pytest.approx([score for _, score in expected], abs=1e-2)
@@ -2,10 +2,15 @@
 Tests for the hybrid search retriever.
 """
 
+import numpy as np
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
-from src.rag.retrieval.hybrid_search import HybridSearchRetriever
+from src.rag.retrieval.hybrid_search import (
+    HybridSearchRetriever,
+    UnsupportedFilterError,
+    invalidate_document_cache
+)
 
 @pytest.mark.asyncio
 async def test_hybrid_search_initialization(vector_store):
@@ -22,18 +27,11 @@ async def test_hybrid_search_initialization(vector_store):
     assert retriever.bm25_weight == 0.3
 
 @pytest.mark.asyncio
-async def test_hybrid_search_retrieval(vector_store, sample_documents):
+async def test_hybrid_search_retrieval(indexed_vector_store):
     """Test hybrid search retrieval."""
-    # Add documents to the vector store
-    documents = [doc["content"] for doc in sample_documents]
-    metadatas = [doc["metadata"] for doc in sample_documents]
-    
-    # Add documents to the vector store
-    vector_store.add_texts(documents, metadatas=metadatas)
-    
     # Create retriever
     retriever = HybridSearchRetriever(
-        vector_store=vector_store,
+        vector_store=indexed_vector_store,
         vector_weight=0.7,
         bm25_weight=0.3
     )
@@ -49,11 +47,11 @@ async def test_hybrid_search_retrieval(vector_store, sample_documents):
     assert "score" in results[0], "Result should have a score"
 
 @pytest.mark.asyncio
-async def test_vector_only_search(vector_store, sample_documents):
+async def test_vector_only_search(indexed_vector_store):
     """Test vector-only search."""
     # Create retriever
     retriever = HybridSearchRetriever(
-        vector_store=vector_store,
+        vector_store=indexed_vector_store,
         vector_weight=1.0,
         bm25_weight=0.0
     )
@@ -70,11 +68,84 @@ async def test_vector_only_search(vector_store, sample_documents):
         assert abs(results[0]["score"] - results[0]["vector_score"]) < 0.001, "Score should equal vector_score"
 
 @pytest.mark.asyncio
-async def test_get_document_by_id(vector_store, sample_documents):
+async def test_vector_only_search_ordering(indexed_vector_store):
+    """Test that vector-only results from Chroma are ranked nearest first."""
+    retriever = HybridSearchRetriever(
+        vector_store=indexed_vector_store,
+        vector_weight=1.0,
+        bm25_weight=0.0
+    )
+    
+    # The query is the text of doc2, so doc2 is the nearest neighbour
+    results = await retriever.search("Hà Nội là thủ đô của Việt Nam, có lịch sử hơn 1000 năm.", limit=3)
+    
+    assert results[0]["metadata"]["id"] == "doc2", "Nearest document should rank first"
+    scores = [result["score"] for result in results]
+    assert scores == sorted(scores, reverse=True), "Scores should be relevance (higher is better)"
+
+@pytest.mark.asyncio
+async def test_search_batch(indexed_vector_store, tmp_path):
+    """Test that batched search ranks each query like a single search."""
+    retriever = HybridSearchRetriever(
+        vector_store=indexed_vector_store,
+        embeddings_path=str(tmp_path / "embeddings.npy")
+    )
+    
+    queries = ["Hà Nội thủ đô", "Đồng bằng sông Cửu Long"]
+    batch_results = await retriever.search_batch(queries, limit=3)
+    
+    assert len(batch_results) == len(queries), "Should return one result list per query"
+    for query, results in zip(queries, batch_results):
+        single_results = await retriever.search(query, limit=3)
+        assert [result["metadata"]["id"] for result in results] == \
+            [result["metadata"]["id"] for result in single_results], "Batched ranking should match search"
+        assert [result["score"] for result in results] == \
+            pytest.approx([result["score"] for result in single_results], abs=1e-5)
+
+@pytest.mark.asyncio
+async def test_search_batch_encodes_queries_once():
+    """Test that batched search without a sidecar encodes all queries in one call."""
+    from langchain.schema import Document
+    
+    embeddings = MagicMock()
+    del embeddings.underlying_embeddings
+    embeddings.embed_documents.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    store = MagicMock()
+    store.embeddings = embeddings
+    store._select_relevance_score_fn.return_value = float
+    store.similarity_search_by_vector_with_relevance_scores.return_value = [
+        (Document(page_content="Hà Nội", metadata={"id": "doc2"}), 0.9)
+    ]
+    retriever = HybridSearchRetriever(vector_store=store)
+    
+    batch_results = await retriever.search_batch(["Hà Nội", "Huế", "Đà Nẵng"], limit=1, use_hybrid=False)
+    
+    assert [results[0]["metadata"]["id"] for results in batch_results] == ["doc2"] * 3
+    assert embeddings.embed_documents.call_count == 1, "Queries should be encoded in one call"
+    embeddings.embed_query.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_vector_only_search_rejects_ignored_filters():
+    """Test that vector-only search fails loudly when the store ignores metadata filters."""
+    from langchain.schema import Document
+    
+    store = MagicMock()
+    store.embeddings = None
+    del store.similarity_search_by_vector_with_relevance_scores
+    store.asimilarity_search_with_score = AsyncMock(return_value=[
+        (Document(page_content="Hà Nội", metadata={"id": "doc2", "source": "other"}), 0.9)
+    ])
+    retriever = HybridSearchRetriever(vector_store=store)
+    
+    with pytest.raises(UnsupportedFilterError):
+        await retriever.search("Hà Nội", filter={"source": "test"}, use_hybrid=False)
+
+@pytest.mark.asyncio
+async def test_get_document_by_id(indexed_vector_store, sample_documents):
     """Test retrieving a document by ID."""
     # Create retriever
     retriever = HybridSearchRetriever(
-        vector_store=vector_store
+        vector_store=indexed_vector_store
     )
     
     # Get a document that should exist
@@ -91,6 +162,95 @@ async def test_get_document_by_id(vector_store, sample_documents):
     non_existent_doc = await retriever.get_document("non_existent_id_123456789")
     assert non_existent_doc is None, "Non-existent document should return None"
 
+@pytest.mark.asyncio
+async def test_get_document_cache_hit():
+    """Test that a found document is served from the cache shared by retrievers of a collection."""
+    store = MagicMock()
+    del store.vector_store
+    store._collection.name = "test_document_cache_hit"
+    store.get_document.return_value = {"content": "Hà Nội", "metadata": {"id": "doc2"}}
+    
+    # The API builds a new retriever per request
+    first = await HybridSearchRetriever(vector_store=store).get_document("doc2")
+    second = await HybridSearchRetriever(vector_store=store).get_document("doc2")
+    
+    assert first == second == {"content": "Hà Nội", "metadata": {"id": "doc2"}}
+    assert store.get_document.call_count == 1, "Second lookup should not reach the store"
+
+@pytest.mark.asyncio
+async def test_get_document_miss_cleared_by_add_texts():
+    """Test that cached misses are shared by retrievers and cleared when documents are added."""
+    store = MagicMock()
+    del store.vector_store
+    store._collection.name = "test_document_miss_cache"
+    store.get_document.return_value = None
+    store.get.return_value = {"ids": []}
+    
+    # The API builds a new retriever per request
+    assert await HybridSearchRetriever(vector_store=store).get_document("doc4") is None
+    assert await HybridSearchRetriever(vector_store=store).get_document("doc4") is None
+    assert store.get_document.call_count == 1, "Repeated miss should be served from the cache"
+    
+    HybridSearchRetriever(vector_store=store).add_texts(["Huế là cố đô của Việt Nam."], metadatas=[{"id": "doc4"}])
+    store.get_document.return_value = {"content": "Huế là cố đô của Việt Nam.", "metadata": {"id": "doc4"}}
+    
+    document = await HybridSearchRetriever(vector_store=store).get_document("doc4")
+    assert document is not None and document["metadata"]["id"] == "doc4", "Added document should be found"
+    assert store.get_document.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_document_miss_cleared_by_invalidation():
+    """Test that documents ingested through the store (on_ingest) clear cached misses."""
+    store = MagicMock()
+    del store.vector_store
+    store._collection.name = "test_document_miss_invalidation"
+    store.get_document.return_value = None
+    
+    assert await HybridSearchRetriever(vector_store=store).get_document("doc5") is None
+    
+    store.get_document.return_value = {"content": "Đà Nẵng", "metadata": {"id": "doc5"}}
+    invalidate_document_cache()
+    
+    document = await HybridSearchRetriever(vector_store=store).get_document("doc5")
+    assert document is not None, "Invalidated miss should be looked up again"
+    assert store.get_document.call_count == 2
+
+def test_add_texts_is_idempotent():
+    """Test that re-ingesting the same documents does not add duplicates."""
+    stored = set()
+    store = MagicMock()
+    store.get.side_effect = lambda ids=None, **kwargs: {"ids": [doc_id for doc_id in ids if doc_id in stored]}
+    store.add_texts.side_effect = lambda texts, metadatas=None, ids=None: stored.update(ids)
+    retriever = HybridSearchRetriever(vector_store=store)
+    
+    texts = ["Việt Nam", "Hà Nội", "Việt Nam"]
+    first = retriever.add_texts(texts)
+    second = retriever.add_texts(texts)
+    
+    assert len(first) == 2, "Duplicate texts in one batch should be added once"
+    assert second == [], "Already stored documents should not be added again"
+    assert store.add_texts.call_count == 1
+
+def test_append_embeddings_guards_sidecar(tmp_path):
+    """Test that empty or differently sized embeddings never corrupt the sidecar."""
+    embeddings_path = tmp_path / "embeddings.npy"
+    store = MagicMock()
+    retriever = HybridSearchRetriever(vector_store=store, embeddings_path=str(embeddings_path))
+    
+    store.get.return_value = {"ids": ["doc1", "doc2"], "embeddings": [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]}
+    retriever._append_embeddings(["doc1", "doc2"])
+    
+    # No vectors returned: the sidecar is left as it was
+    store.get.return_value = {"ids": [], "embeddings": []}
+    retriever._append_embeddings(["doc3"])
+    assert np.load(embeddings_path).shape == (2, 3)
+    
+    # Vectors from a different model: refused with a clear error
+    store.get.return_value = {"ids": ["doc3"], "embeddings": [[1.0, 0.0]]}
+    with pytest.raises(ValueError, match="width"):
+        retriever._append_embeddings(["doc3"])
+    assert np.load(embeddings_path).shape == (2, 3)
+
 @pytest.mark.asyncio
 async def test_keyword_extraction(vector_store):
     """Test keyword extraction from queries."""
@@ -111,11 +271,11 @@ async def test_keyword_extraction(vector_store):
     assert len(short_keywords) > 0, "Should extract keywords even from short queries"
 
 @pytest.mark.asyncio
-async def test_search_with_filter(vector_store, sample_documents):
+async def test_search_with_filter(indexed_vector_store):
     """Test search with metadata filter."""
     # Create retriever
     retriever = HybridSearchRetriever(
-        vector_store=vector_store
+        vector_store=indexed_vector_store
     )
     
     # Search with filter
@@ -125,4 +285,18 @@ async def test_search_with_filter(vector_store, sample_documents):
     # Check that all results match the filter
     assert len(results) > 0, "Should return results even with filter"
     for result in results:
-        assert result["metadata"].get("source") == "test", "All results should match the filter" 
\ No newline at end of file
+        assert result["metadata"].get("source") == "test", "All results should match the filter"
+
+
+def test_fusion_scores():
+    """Test per-retriever score scaling for each fusion method."""
+    scores = np.array([4.0, 2.0, 1.0], dtype=np.float32)
+    
+    rsf = HybridSearchRetriever(vector_store=MagicMock(), fusion_method="rsf")
+    assert rsf._fusion_scores(scores).tolist() == pytest.approx([1.0, 1.0 / 3.0, 0.0])
+    
+    rrf = HybridSearchRetriever(vector_store=MagicMock(), fusion_method="rrf", rrf_k=60)
+    assert rrf._fusion_scores(scores).tolist() == pytest.approx([1 / 61, 1 / 62, 1 / 63])
+    
+    weighted = HybridSearchRetriever(vector_store=MagicMock(), fusion_method="weighted")
+    assert weighted._fusion_scores(scores).tolist() == [4.0, 2.0, 1.0]
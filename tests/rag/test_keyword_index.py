@@ -0,0 +1,48 @@
+"""
+Tests for the BM25 keyword index.
+"""
+
+import pytest
+
+from src.rag.retrieval.keyword_index import KeywordIndex
+
+@pytest.fixture
+def keyword_index(sample_documents):
+    """Provide a keyword index built from the sample documents."""
+    return KeywordIndex().build(
+        [doc["content"] for doc in sample_documents],
+        [doc["metadata"] for doc in sample_documents],
+        [doc["metadata"]["id"] for doc in sample_documents]
+    )
+
+def test_keyword_index_search(keyword_index):
+    """Test that matching documents are ranked with the best match first."""
+    results = keyword_index.search("Hà Nội thủ đô", k=2)
+    
+    assert len(results) > 0, "Should return at least one document"
+    assert keyword_index.ids[results[0][0]] == "doc2", "Best match should be the Hà Nội document"
+    assert results[0][1] == pytest.approx(1.0), "Best match should be scaled to 1.0"
+
+def test_keyword_index_no_match(keyword_index):
+    """Test that a query without indexed terms returns nothing."""
+    assert keyword_index.search("xyzabc", k=3) == []
+
+def test_keyword_index_filters(keyword_index):
+    """Test that metadata filters exclude non-matching documents."""
+    results = keyword_index.search("Việt Nam", k=3, filters={"id": "doc3"})
+    
+    assert [keyword_index.ids[doc_idx] for doc_idx, _ in results] == ["doc3"]
+
+def test_keyword_index_persistence(keyword_index, tmp_path):
+    """Test that a saved index loads with the same results."""
+    path = str(tmp_path / "keyword_index.pkl")
+    keyword_index.save(path)
+    
+    loaded = KeywordIndex.load(path)
+    assert loaded.search("lịch sử", k=3) == keyword_index.search("lịch sử", k=3)
+
+def test_keyword_index_ignores_punctuation(keyword_index):
+    """Test that terms followed by punctuation still match ("Á." -> "á")."""
+    results = keyword_index.search("á", k=3)
+    
+    assert [keyword_index.ids[doc_idx] for doc_idx, _ in results] == ["doc1"]